@@ -1,111 +1,64 @@
 import streamlit as st
-import requests
-import json
 import pandas as pd
 from datetime import datetime, time
-import time as tm
 
-def run():
-    st.markdown(
-        """
-        <h1 style='text-align: center; color: white; background-color: #A9DFBF; padding: 15px; border-radius: 10px;'>
-            ➕ Tambah Data SPK
-        </h1>
-        """,
-        unsafe_allow_html=True
-    )
+import api
+import mirror
+import options_index
+import options_store
+import outbox
+import schema
+
+# Tabel SPK pending dengan filter dan pagination. Sebagai fragment, mengganti filter atau halaman
+# hanya menjalankan ulang bagian ini (baca mirror lokal), tanpa sinkronisasi, opsi, dan form.
+# Widget filter ada di halaman (bukan sidebar) karena fragment tidak bisa menulis ke sidebar.
+@st.fragment
+def data_table():
+    # jumlah seluruh data SPK pending di mirror lokal
+    _, total_all = mirror.query_pending_spk(limit=0)
+    if total_all == 0:
+        return
+
+    # Pencarian teks bebas (indeks full-text di mirror, hasil urut relevansi)
+    search = st.text_input("🔎 Cari Masalah / Tindakan", placeholder="contoh: ganti bearing")
 
-    # apps script
-    APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbyoDP56iTC_G6F08vWe7kJK2BpauDVZeea1aWwpqVKGe-C8o9K2D-Hx0seo1vMgcPE/exec"
+    # filter
+    with st.expander("🔍 Filter Data (Opsional)"):
+        col1, col2 = st.columns(2)
 
-    def get_all_data():
-        try:
-            response = requests.get(APPS_SCRIPT_URL, params={"action": "get_data"}, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Terjadi kesalahan saat mengambil data: {e}")
-            return []
+        # Filter berdasarkan PIC (Boleh kosong, artinya semua)
+        pic_options = mirror.pending_pics()
+        selected_pic = col1.multiselect("Pilih PIC", pic_options)
 
-    # ambil data dari gspreadsheet
-    all_data = get_all_data()
+        # Filter berdasarkan satu tanggal (Boleh tidak dipilih)
+        selected_date = col2.date_input("Pilih Tanggal", None)
 
-    # filter
-    if isinstance(all_data, list) and len(all_data) > 0:
-        df = pd.DataFrame(all_data, columns=[
-            "ID", "BU", "Line", "Produk", "Mesin", 
-            "Masalah", "Tindakan", "Tanggal", "PIC"
-        ])
-        
-        # Konversi kolom Tanggal ke format datetime dan hanya ambil bagian tanggal (tanpa waktu)
-        df["Tanggal"] = pd.to_datetime(df["Tanggal"]).dt.date  
+    # Pagination (Tampilkan 10 baris per halaman); filter dikerjakan di mirror
+    items_per_page = 10
+    _, total_filtered = mirror.query_pending_spk(selected_pic, selected_date, limit=0, text=search)
+    total_pages = max(1, -(-total_filtered // items_per_page))  # Hitung jumlah halaman
+    page_number = st.number_input("Pilih Halaman", min_value=1, max_value=total_pages, value=1, step=1)
 
-        # Sidebar untuk filter
-        st.sidebar.header("Filter Data (Opsional)")
+    # Ambil hanya baris untuk halaman yang dipilih
+    rows, _ = mirror.query_pending_spk(
+        selected_pic, selected_date, offset=(page_number - 1) * items_per_page, limit=items_per_page, text=search
+    )
+    df_paginated = schema.load_spk(rows)
 
-        # Filter berdasarkan PIC (Boleh kosong, artinya semua)
-        pic_options = df["PIC"].unique().tolist()
-        selected_pic = st.sidebar.multiselect("Pilih PIC", pic_options)
+    # Tampilkan data yang sudah difilter dan dipaginasi
+    st.subheader(f"Data Keseluruhan (Menampilkan Halaman {page_number} dari {total_pages})")
+    st.dataframe(df_paginated, use_container_width=True, column_config=schema.column_config(df_paginated))
 
-        # Filter berdasarkan satu tanggal (Boleh tidak dipilih)
-        selected_date = st.sidebar.date_input("Pilih Tanggal", None)
-
-        # Filter hanya jika ada input dari user
-        df_filtered = df.copy()
-        if selected_pic:
-            df_filtered = df_filtered[df_filtered["PIC"].isin(selected_pic)]
-        if selected_date:
-            df_filtered = df_filtered[df_filtered["Tanggal"] == selected_date]
-
-        # Pagination (Tampilkan 10 baris per halaman)
-        items_per_page = 10
-        total_pages = -(-len(df_filtered) // items_per_page)  # Hitung jumlah halaman
-        page_number = st.sidebar.number_input("Pilih Halaman", min_value=1, max_value=total_pages, value=1, step=1)
-
-        # Hitung indeks awal dan akhir untuk slicing
-        start_idx = (page_number - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        df_paginated = df_filtered.iloc[start_idx:end_idx]
-
-        # Tampilkan data yang sudah difilter dan dipaginasi
-        st.subheader(f"Data Keseluruhan (Menampilkan Halaman {page_number} dari {total_pages})")
-        st.dataframe(df_paginated, use_container_width=True)
-
-        # Info jumlah data
-        st.caption(f"Menampilkan {len(df_paginated)} dari {len(df_filtered)} data yang tersedia.")
-        
-    # untuk mendapatkan opsi dari gsheets
-    def get_options():
-        try:
-            response = requests.get(APPS_SCRIPT_URL, params={"action": "get_options"}, timeout=10)
-            response.raise_for_status()
-            options = response.json()
-            
-            # menambahkan opsi kosong "" sebagai default di setiap kategori
-            for key in options:
-                options[key].insert(0, "")
-            return options
-        except requests.exceptions.RequestException as e:
-            st.error(f"Terjadi kesalahan saat mengambil data: {e}")
-            return {}
-
-    # mengambil data hanya saat pertama kali
-    if "all_data" not in st.session_state:
-        st.session_state.all_data = get_all_data()
-    if "options" not in st.session_state:
-        st.session_state.options = get_options()
-
-    # untuk mengirim data ke gsheets
-    def add_data(form_data):
-        try:
-            response = requests.post(APPS_SCRIPT_URL, json=form_data, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"status": "error", "error": str(e)}
-
-    # mengambil data untuk select box
-    options = get_options()
+    # Info jumlah data
+    st.caption(f"Menampilkan {len(df_paginated)} dari {total_filtered} data yang tersedia.")
+
+
+# Form tambah SPK. Pilihan BU/Mesin yang saling bergantung dan konfirmasi hanya menjalankan ulang
+# fragment ini; payload opsi diambil sekali oleh run() lalu dipakai ulang setiap rerun fragment.
+@st.fragment
+def add_form(options_payload):
+    # index opsi select box (disusun sekali per payload get_options)
+    options = options_index.get(options_payload)
 
     # cek dan set default di session_state jika belum ada
     defaults = {
@@ -129,7 +82,8 @@ def run():
 
     st.subheader("Isi Data Berikut:")
 
-    bu_options = [item[0] if isinstance(item, list) and item else item for item in options.get("BU", [""])]
+    # opsi kosong "" sebagai default
+    bu_options = ("",) + options.values("BU")
     bu = st.selectbox("BU", bu_options, key="form_bu")
 
     # reset produk jika BU berubah
@@ -138,20 +92,20 @@ def run():
         st.session_state.form_produk = ""
         st.session_state.form_pic = ""
 
-    produk_options = [item[1] for item in options.get("Produk", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu] if bu else [""]
+    produk_options = options.children("Produk", bu) if bu else [""]
     produk = st.selectbox("Produk", produk_options, key="form_produk")
 
-    mesin_options = [item[1] for item in options.get("Mesin", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu] if bu else [""]
+    mesin_options = options.children("Mesin", bu) if bu else [""]
     mesin = st.selectbox("Mesin", mesin_options, key="form_mesin")
 
     if mesin != st.session_state.form_mesin:
         st.session_state.form_mesin = mesin
         st.session_state.form_masalah = "" 
 
-    masalah_options = [item[1] for item in options.get("Masalah", []) if isinstance(item, list) and len(item) > 1 and item[0] == mesin] if bu else [""]
+    masalah_options = options.children("Masalah", mesin) if bu else [""]
     masalah = st.selectbox("Masalah", masalah_options, key="form_masalah")
 
-    line_options = [item[0] if isinstance(item, list) and item else item for item in options.get("Line", [""])]
+    line_options = ("",) + options.values("Line")
     line = st.selectbox("Line", line_options , key="form_line")
 
     tindakan = st.text_area("Tindakan Perbaikan", value=st.session_state.get("form_tindakan"))
@@ -159,8 +113,7 @@ def run():
     tanggal = st.date_input("Tanggal", value=st.session_state.get("form_date"))
 
     # Ambil daftar PIC berdasarkan BU yang dipilih
-    pic_options = [item[1] for item in options.get("PIC", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu]
-    pic_options = list(pic_options) if pic_options else []  # Pastikan tetap list, bahkan jika kosong
+    pic_options = options.children("PIC", bu)
 
     # Pastikan default value hanya berisi opsi yang ada dalam pic_options
     default_pic = st.session_state.get("form_pic", [])
@@ -201,19 +154,43 @@ def run():
             cancel = st.button("❌ Batal")
 
         if confirm:
-            response = add_data({"action": "add_data", **data_to_send})
-            if response.get("status") == "success":
-                st.toast("✅ Data berhasil ditambahkan!")
-                tm.sleep(2)
-                st.session_state.show_confirmation = False  # Hapus state konfirmasi
-                st.rerun()
-            else:
-                st.error(f"❌ Gagal menambahkan data: {response.get('error', 'Tidak diketahui')}")
+            # disimpan ke outbox lokal; pengiriman ke gsheets berjalan di background
+            key = outbox.submit("spk", "add_data", data_to_send)
+            st.session_state.setdefault("outbox_keys", []).append(key)
+            st.toast("📥 Data disimpan, sedang dikirim ke Google Sheet...")
+            st.session_state.show_confirmation = False  # Hapus state konfirmasi
+            st.rerun()
 
         elif cancel:
             st.session_state.show_confirmation = False  # Hapus state konfirmasi
             st.info("✅ Data tidak jadi dikirim.")
             st.rerun()
+
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #A9DFBF; padding: 15px; border-radius: 10px;'>
+            ➕ Tambah Data SPK
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # sinkronkan mirror lokal dan ambil opsi dari gspreadsheet secara paralel
+    sync = mirror.sync_async()
+    results, errors = api.get_many({
+        "options": lambda: options_store.get("spk"),
+    })
+    errors.update(sync.result())
+    for name, e in errors.items():
+        st.error(f"Terjadi kesalahan saat mengambil {name}: {e}")
+
+    data_table()
+    add_form(results.get("options", {}))
+
+    # status kiriman session ini (menunggu / tersimpan / gagal)
+    outbox.status_panel(st.session_state.get("outbox_keys", []))
             
 if __name__ == "__main__":
     run()            
\ No newline at end of file
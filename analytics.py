@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+
+import streamlit as st
+import pandas as pd
+
+import mirror
+import rollups
+
+# Label tampilan untuk periode rekap
+PERIOD_LABELS = {"week": "Mingguan", "day": "Harian"}
+# Rentang awal yang ditampilkan (hari sebelum data terakhir)
+DEFAULT_RANGE_DAYS = 90
+# Jumlah nilai teratas yang digambar di grafik tren
+TOP_N = 5
+
+
+# Tabel ringkasan per nilai dimensi: jumlah kejadian, total downtime dan MTTR
+def summary_table(dimension, rows):
+    df = pd.DataFrame(rows, columns=[dimension, "Jumlah Kejadian", "Tercatat Durasi", "Downtime (menit)"])
+    df["Downtime (jam)"] = (df["Downtime (menit)"] / 60).round(1)
+    # MTTR hanya dari kejadian yang jam mulai/selesainya terisi
+    df["MTTR (menit)"] = (df["Downtime (menit)"] / df["Tercatat Durasi"].where(df["Tercatat Durasi"] > 0)).round(1)
+    return df[[dimension, "Jumlah Kejadian", "Downtime (jam)", "MTTR (menit)", "Tercatat Durasi"]]
+
+
+# Dashboard dari tabel rollup di mirror; mengganti dimensi/periode/rentang hanya menjalankan ulang fragment ini
+@st.fragment
+def dashboard(first_day, last_day):
+    col1, col2, col3 = st.columns(3)
+    dimension = col1.selectbox("Kelompokkan per", rollups.DIMENSIONS, index=rollups.DIMENSIONS.index("Mesin"))
+    period = col2.radio("Periode", list(PERIOD_LABELS), format_func=PERIOD_LABELS.get, horizontal=True)
+    default_start = max(first_day, last_day - timedelta(days=DEFAULT_RANGE_DAYS))
+    selected = col3.date_input(
+        "Rentang Tanggal", (default_start, last_day), min_value=first_day, max_value=last_day
+    )
+    # selama rentang baru dipilih separuh, date_input hanya mengembalikan tanggal awal
+    start, end = selected[0], selected[-1]
+    if period == "week":
+        # rekap mingguan disimpan per awal minggu (Senin)
+        start = start - timedelta(days=start.weekday())
+
+    rows = mirror.rollup(dimension, period, start.isoformat(), end.isoformat())
+    if not rows:
+        st.info("Tidak ada data pada rentang ini.")
+        return
+
+    df = summary_table(dimension, rows)
+    total_records = int(df["Jumlah Kejadian"].sum())
+    total_minutes = float(sum(r[3] for r in rows))
+    total_timed = int(df["Tercatat Durasi"].sum())
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Jumlah Kejadian", f"{total_records:,}")
+    m2.metric("Total Downtime", f"{total_minutes / 60:,.1f} jam")
+    m3.metric("MTTR", f"{total_minutes / total_timed:,.1f} menit" if total_timed else "-")
+
+    # Tren downtime untuk nilai dengan downtime terbesar
+    top = df[dimension].head(TOP_N).tolist()
+    series = pd.DataFrame(
+        mirror.rollup_series(dimension, period, top, start.isoformat(), end.isoformat()),
+        columns=["Periode", dimension, "Jumlah Kejadian", "Downtime (menit)"],
+    )
+    if not series.empty:
+        st.subheader(f"Tren Downtime {PERIOD_LABELS[period]} - {TOP_N} {dimension} Teratas (jam)")
+        chart = series.pivot_table(index="Periode", columns=dimension, values="Downtime (menit)", aggfunc="sum")
+        st.line_chart(chart.fillna(0) / 60)
+
+    st.subheader(f"Rekap per {dimension}")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    # Frekuensi masalah: kejadian terbanyak (tidak bergantung pada durasi)
+    if dimension != "Masalah":
+        problems = mirror.rollup("Masalah", period, start.isoformat(), end.isoformat())
+        st.subheader("Masalah Paling Sering")
+        st.bar_chart(
+            pd.DataFrame(problems, columns=["Masalah", "Jumlah", "Tercatat", "Downtime"])
+            .nlargest(10, "Jumlah").set_index("Masalah")["Jumlah"]
+        )
+
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #7FB3D5; padding: 15px; border-radius: 10px;'>
+            📊 Analitik Maintenance
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # rekap ikut diperbarui setiap sinkronisasi mirror (hanya baris ALL yang berubah)
+    errors = mirror.sync_async().result()
+    for name, e in errors.items():
+        st.warning(f"⚠️ Sinkronisasi {name} gagal ({e}), menampilkan data lokal terakhir.")
+
+    first, last = mirror.rollup_bounds()
+    if not first:
+        st.info("Belum ada data Preventive untuk dianalisis.")
+        return
+
+    st.caption("Downtime = jam Selesai - jam Mulai; MTTR = rata-rata downtime per kejadian yang jamnya terisi.")
+    dashboard(date.fromisoformat(first), date.fromisoformat(last))
+
+
+if __name__ == "__main__":
+    run()
\ No newline at end of file
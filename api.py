@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import columnar
+import metrics
+import schema
+from cache import cache
+
+# Daftar deployment Apps Script yang dipakai aplikasi
+ENDPOINTS = {
+    # data Preventive & SPK untuk halaman login
+    "main": "https://script.google.com/macros/s/AKfycbyLDNaiH2GdLTlX-eqlBFsemfMOn5ioJhYujFsHlzQqZBZlBpUs5T-Rmc6QJzjHXBPw/exec",
+    # tambah/update SPK
+    "spk": "https://script.google.com/macros/s/AKfycbyoDP56iTC_G6F08vWe7kJK2BpauDVZeea1aWwpqVKGe-C8o9K2D-Hx0seo1vMgcPE/exec",
+    # approval Preventive Form oleh SPV
+    "spv": "https://script.google.com/macros/s/AKfycbzr96YkQ_yT1Rld_I3Dw_q64FLKkawP9uTvennnlgJ0T8tYFuK6hiqgOBRj9y5XuZgI/exec",
+    # approval Preventive Form oleh SM
+    "sm": "https://script.google.com/macros/s/AKfycbwdjUXFYoqeh5VkJ8ummSADWcXGhr_TgXFau_N-IJJlU5_m1Wi8Tbo0OB9HeiUsmsPeHQ/exec",
+}
+
+# SPK_API_BASE mengarahkan semua deployment ke server lain (misalnya benchmarks/mock_server.py),
+# dengan URL <SPK_API_BASE>/<nama deployment>
+if os.environ.get("SPK_API_BASE"):
+    ENDPOINTS = {name: os.environ["SPK_API_BASE"].rstrip("/") + "/" + name for name in ENDPOINTS}
+
+# Timeout baca (detik) per action; timeout koneksi selalu CONNECT_TIMEOUT
+TIMEOUTS = {
+    "get_data": 30,
+    "get_all_data": 60,
+    "get_options": 10,
+    "get_changes": 30,
+    "add_data": 20,
+    "update_data": 20,
+    "add_data_batch": 90,
+    "update_data_batch": 90,
+}
+DEFAULT_TIMEOUT = 30
+CONNECT_TIMEOUT = 5
+
+# Jumlah record maksimal per request batch (batas waktu eksekusi Apps Script)
+BATCH_SIZE = 100
+
+# Action yang membaca data SPK/ALL; semua deployment memakai spreadsheet yang sama
+DATA_ACTIONS = ["get_data", "get_all_data"]
+
+# Parameter filter get_all_data -> kolom sheet ALL (sama dengan QUERY_FILTERS di apps_script.txt)
+QUERY_FILTERS = {"pic": "PIC", "kondisi": "Kondisi", "approve": "Approve"}
+
+# Jumlah request ke Apps Script yang boleh berjalan bersamaan dari satu proses
+# (Apps Script membatasi eksekusi simultan per script); sisanya antre, tidak gagal
+MAX_CONCURRENT = int(os.environ.get("SPK_MAX_CONCURRENT", "6"))
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+
+def _build_session():
+    # GET diulang saat 429/5xx dengan backoff; POST hanya diulang jika koneksi gagal
+    # (request belum terkirim), supaya add_data tidak tercatat dua kali
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Satu session untuk seluruh proses agar koneksi TLS dipakai ulang (keep-alive)
+session = _build_session()
+
+# Thread pool bersama untuk fetch paralel (ukurannya tidak melebihi pool koneksi)
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api")
+
+
+def url_for(endpoint):
+    return ENDPOINTS[endpoint]
+
+
+def timeout_for(action):
+    return (CONNECT_TIMEOUT, TIMEOUTS.get(action, DEFAULT_TIMEOUT))
+
+
+# Kirim request dan catat metriknya (waktu antre, network dan decode JSON, ukuran, jumlah baris, error)
+def _request(method, endpoint, action, **kwargs):
+    name = f"{endpoint}/{action}"
+    start = time.perf_counter()
+    with _slots:
+        sent = time.perf_counter()
+        try:
+            response = session.request(method, url_for(endpoint), timeout=timeout_for(action), **kwargs)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            metrics.registry.record("api", name, time.perf_counter() - start, error=True)
+            raise
+    received = time.perf_counter()
+    try:
+        result = response.json()
+    except ValueError:
+        metrics.registry.record("api", name, time.perf_counter() - start, error=True, size=len(response.content))
+        raise
+    done = time.perf_counter()
+    metrics.registry.record(
+        "api", name, done - start,
+        error=isinstance(result, dict) and "error" in result,
+        size=len(response.content),
+        rows=metrics.count_rows(result),
+        stages={"queue": sent - start, "network": received - sent, "decode": done - received},
+    )
+    return result
+
+
+# Ambil data langsung dari Apps Script tanpa cache
+def fetch(endpoint, action, **params):
+    return _request("GET", endpoint, action, params={"action": action, **params})
+
+
+# Ambil data dari Apps Script lewat cache bersama. Request identik yang datang bersamaan
+# (misalnya banyak pengguna login di menit yang sama) hanya dikirim sekali.
+# Nilai yang dikembalikan dipakai bersama antar session, jadi jangan diubah langsung.
+def get(endpoint, action, **params):
+    missed, waited = [], []
+
+    def load():
+        missed.append(True)
+        return fetch(endpoint, action, **params)
+
+    name = f"{endpoint}/{action}"
+    result = cache.get_or_fetch(url_for(endpoint), action, load, params, on_wait=lambda: waited.append(True))
+    if waited:
+        metrics.registry.coalesced(name)
+    else:
+        metrics.registry.cache_result(name, hit=not missed)
+    return result
+
+
+# Ambil beberapa action sekaligus secara paralel.
+# calls: {nama: (endpoint, action)}, {nama: (endpoint, action, params)},
+# atau {nama: fungsi tanpa argumen} untuk sumber lain (misalnya options_store)
+# Mengembalikan (results, errors), masing-masing dict per nama
+def get_many(calls):
+    futures = {}
+    for name, call in calls.items():
+        if callable(call):
+            futures[name] = executor.submit(call)
+            continue
+        endpoint, action = call[0], call[1]
+        params = call[2] if len(call) > 2 else {}
+        futures[name] = executor.submit(get, endpoint, action, **params)
+
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except requests.exceptions.RequestException as e:
+            errors[name] = e
+    return results, errors
+
+
+# Satu halaman sheet ALL lewat get_all_data (deployment SPK) dengan filter kondisi/approve/pic
+# (beberapa nilai dipisah "|"). Deployment yang belum mendukung filter mengembalikan seluruh sheet;
+# filter dan slicing lalu dikerjakan di sini. Hasilnya selalu {"total": ..., ...} yang bisa dibaca
+# columnar.to_frame, atau respons error apa adanya.
+def get_all_page(offset=0, limit=None, **filters):
+    params = {**filters, "offset": offset, **columnar.COLUMNAR}
+    if limit is not None:
+        params["limit"] = limit
+    page = get("spk", "get_all_data", **params)
+    if isinstance(page, dict) and ("total" in page or "error" in page):
+        return page
+
+    df = columnar.to_frame(page, columns=schema.ALL_COLUMNS)
+    for key, value in filters.items():
+        values = [v.strip() for v in str(value).split("|")]
+        df = df[df[QUERY_FILTERS[key]].fillna("").astype(str).str.strip().isin(values)]
+    end = None if limit is None else offset + limit
+    return {"total": len(df), "rows": df.iloc[offset:end].values.tolist()}
+
+
+# Kirim data ke Apps Script; cache data dihapus jika berhasil
+def post(endpoint, payload):
+    action = payload.get("action")
+    result = _request("POST", endpoint, action, json=payload)
+    if isinstance(result, dict) and "error" not in result:
+        for data_action in DATA_ACTIONS:
+            cache.invalidate(action=data_action)
+    return result
@@ -0,0 +1,116 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Uji beban alokasi ID add_data: ratusan POST add_data paralel ke pengganti lokal Apps Script
+# (atau ke deployment uji lewat --url), lalu cek bahwa semua ID baru unik dan hitung throughput.
+#   python benchmarks/id_stress.py [--requests 300] [--workers 50] [--batch 1] [--latency 0.2]
+#   python benchmarks/id_stress.py --legacy-ids     # alokasi lama (ID terakhir + 1), untuk pembanding
+#   python benchmarks/id_stress.py --url https://script.google.com/macros/s/<deployment uji>/exec
+#   python benchmarks/id_stress.py --help         # daftar opsi
+# Keluar dengan kode 1 jika ada ID dobel atau request yang gagal.
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockAppsScript  # noqa: E402
+
+_local = threading.local()
+
+
+def record(n):
+    return {
+        "BU": "BU1", "Line": "Line 1", "Produk": "Produk BU1-1", "Mesin": "Mesin BU1-1",
+        "Masalah": "Masalah 1", "Tindakan": f"Uji beban {n}", "Tanggal": "2025-03-05", "PIC": "PIC BU1-1",
+    }
+
+
+# Satu request add_data (batch=1) atau add_data_batch; mengembalikan (detik, ID baru, pesan error)
+def send(url, n, batch):
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+
+    if batch == 1:
+        payload = {"action": "add_data", **record(n)}
+    else:
+        payload = {"action": "add_data_batch", "records": [record(n * batch + i) for i in range(batch)]}
+
+    start = time.perf_counter()
+    try:
+        response = session.post(url, json=payload, timeout=120)
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return time.perf_counter() - start, [], [str(e)]
+    elapsed = time.perf_counter() - start
+
+    results = data.get("results", []) if batch > 1 else [data]
+    ids = [r["new_id"] for r in results if r.get("status") == "success" and "new_id" in r]
+    errors = [r.get("error", "Tidak diketahui") for r in results if r.get("status") != "success"]
+    if batch > 1 and "error" in data:
+        errors.append(data["error"])
+    return elapsed, ids, errors
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Uji beban alokasi ID add_data: cek ID baru unik dan hitung throughput.")
+    parser.add_argument("--requests", type=int, default=300, help="jumlah request add_data (default 300)")
+    parser.add_argument("--workers", type=int, default=50, help="jumlah request paralel (default 50)")
+    parser.add_argument("--batch", type=int, default=1, help="record per request; >1 memakai add_data_batch (default 1)")
+    parser.add_argument("--latency", type=float, default=0.2, help="latency server lokal dalam detik (default 0.2)")
+    parser.add_argument("--legacy-ids", action="store_true", help="alokasi ID lama (ID terakhir + 1) di server lokal")
+    parser.add_argument("--url", help="URL deployment uji; tanpa ini dipakai pengganti lokal Apps Script")
+    args = parser.parse_args()
+    if args.requests < 1 or args.workers < 1 or args.batch < 1:
+        parser.error("--requests, --workers dan --batch harus minimal 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    total, workers, batch, url = args.requests, args.workers, args.batch, args.url
+
+    server = None
+    if url is None:
+        mock = MockAppsScript(rows=1000, latency=args.latency, row_cost=0, legacy_ids=args.legacy_ids)
+        server = mock.start()
+        url = f"http://127.0.0.1:{server.server_port}/spk"
+
+    print(f"{total} request x {batch} record, {workers} paralel -> {url}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(lambda n: send(url, n, batch), range(total)))
+    wall = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    latencies = [elapsed for elapsed, _, _ in outcomes]
+    ids = [i for _, new_ids, _ in outcomes for i in new_ids]
+    errors = Counter(e for _, _, errs in outcomes for e in errs)
+    duplicates = {i: n for i, n in Counter(ids).items() if n > 1}
+
+    print(f"record berhasil   {len(ids)} dari {total * batch}")
+    print(f"ID unik           {len(set(ids))}")
+    print(f"ID dobel          {len(duplicates)}" + (f"  contoh: {sorted(duplicates)[:10]}" if duplicates else ""))
+    for error, n in errors.most_common(5):
+        print(f"error             {n}x {error}")
+    print(f"waktu total       {wall:.2f} s")
+    print(f"throughput        {total / wall:.1f} request/s, {len(ids) / wall:.1f} record/s")
+    print(f"latency ms        p50 {percentile(latencies, 50) * 1000:.0f}, p95 {percentile(latencies, 95) * 1000:.0f}, "
+          f"maks {max(latencies) * 1000:.0f}")
+
+    sys.exit(1 if duplicates or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
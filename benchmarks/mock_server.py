@@ -0,0 +1,437 @@
+import base64
+import gzip
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Pengganti lokal web app Apps Script (apps_script.txt) untuk benchmark tanpa Google.
+# Setiap deployment dilayani di path /<nama> (main, spk, spv, sm), sama seperti api.ENDPOINTS
+# setelah SPK_API_BASE di-set. Sheet dibuat acak dengan jumlah baris yang bisa diatur, dan setiap
+# request diberi jeda buatan supaya mendekati waktu respons Apps Script.
+#
+#   python benchmarks/mock_server.py --rows 10000 --latency 0.8 --port 8765
+#   SPK_API_BASE=http://127.0.0.1:8765 streamlit run login.py
+
+SPK_HEADERS = ["ID", "BU", "Line", "Produk", "Mesin", "Masalah", "Tindakan", "Tanggal", "PIC"]
+ALL_HEADERS = [
+    "ID", "BU", "Line", "Produk", "Mesin", "Tanggal",
+    "Mulai", "Selesai", "Masalah", "Tindakan", "Deskripsi",
+    "Quantity", "PIC", "Kondisi", "Alasan", "SPV", "Last Update SPV",
+    "Approve", "Reason", "SM", "Last Update SM"
+]
+QUERY_FILTERS = {"pic": "PIC", "kondisi": "Kondisi", "approve": "Approve"}
+
+# Jeda default (detik): dasar per request + per 1000 baris sheet yang dibaca
+DEFAULT_LATENCY = 0.5
+DEFAULT_ROW_COST = 0.01
+# Mode --legacy-ids: jeda (detik) antara membaca ID terakhir dan menulis baris baru
+LEGACY_WRITE_GAP = 0.05
+
+
+class Workbook:
+    # Isi spreadsheet tiruan: sheet SPK, ALL, PIC_ID, CHANGELOG dan master data opsi
+    def __init__(self, rows=1000, seed=1):
+        rnd = random.Random(seed)
+        self.lock = threading.Lock()
+
+        bus = [f"BU{i}" for i in range(1, 5)]
+        self.options = {
+            "BU": [[bu] for bu in bus],
+            "Line": [[f"Line {i}"] for i in range(1, 6)],
+            "Produk": [[bu, f"Produk {bu}-{i}"] for bu in bus for i in range(1, 6)],
+            "Mesin": [[bu, f"Mesin {bu}-{i}"] for bu in bus for i in range(1, 6)],
+            "Masalah": [[f"Mesin {bu}-{i}", f"Masalah {j}"] for bu in bus for i in range(1, 6) for j in range(1, 4)],
+            "PIC": [[bu, f"PIC {bu}-{i}"] for bu in bus for i in range(1, 4)],
+            "SPV": ["SPV 1", "SPV 2"],
+            "SM": ["SM 1"],
+        }
+
+        start = date.today() - timedelta(days=365)
+        self.spk = []
+        self.all = []
+        self.pic_id = []
+        for i in range(1, rows + 1):
+            bu = rnd.choice(bus)
+            mesin = f"Mesin {bu}-{rnd.randint(1, 5)}"
+            pic = f"PIC {bu}-{rnd.randint(1, 3)}"
+            tanggal = (start + timedelta(days=rnd.randint(0, 365))).strftime("%d-%b-%y")
+            row = [str(i), bu, f"Line {rnd.randint(1, 5)}", f"Produk {bu}-{rnd.randint(1, 5)}", mesin,
+                   f"Masalah {rnd.randint(1, 3)}", "Ganti part", tanggal, pic]
+            self.spk.append(row)
+            self.pic_id.append([str(i), pic])
+
+            # sekitar 60% SPK sudah diproses ke sheet ALL
+            if rnd.random() < 0.6:
+                kondisi = rnd.choice(["", "On Progress", "Close", "Done"])
+                approve = rnd.choice(["", "Approved", "Revise"]) if kondisi in ("Close", "Done") else ""
+                self.all.append({
+                    **{h: "" for h in ALL_HEADERS},
+                    "ID": str(i), "BU": bu, "Line": row[2], "Produk": row[3], "Mesin": mesin,
+                    "Tanggal": tanggal, "Masalah": row[5], "Tindakan": row[6], "PIC": pic,
+                    "Kondisi": kondisi, "Approve": approve,
+                })
+        # jam mulai/selesai perbaikan untuk data yang sudah close/done (RNG terpisah supaya data lain tetap sama)
+        times = random.Random(seed + 1)
+        for r in self.all:
+            if r["Kondisi"] in ("Close", "Done"):
+                mulai = times.randint(6 * 60, 20 * 60)
+                selesai = (mulai + times.randint(10, 240)) % (24 * 60)
+                r["Mulai"] = f"{mulai // 60:02d}:{mulai % 60:02d}"
+                r["Selesai"] = f"{selesai // 60:02d}:{selesai % 60:02d}"
+        self.all_index = {int(r["ID"]): r for r in self.all}
+        self.spk_index = {int(r[0]): r for r in self.spk}
+        self.changelog = []
+        # counter ID SPK berikutnya (NEXT_SPK_ID di apps_script.txt)
+        self.next_id = rows + 1
+
+    def log_change(self, sheet, ids):
+        self.changelog.extend((sheet, int(i)) for i in ids)
+
+    def options_version(self):
+        return hashlib.md5(json.dumps(self.options, sort_keys=True).encode()).hexdigest()
+
+
+def apply_query(rows, params, get_field):
+    filters = [(col, [v.strip() for v in params[key].split("|")]) for key, col in QUERY_FILTERS.items() if key in params]
+    dates = None
+    if params.get("date"):
+        try:
+            dates = {datetime.strptime(params["date"], "%Y-%m-%d").strftime("%d-%b-%y")}
+        except ValueError:
+            dates = {params["date"]}
+
+    pic_options, seen, matched = [], set(), []
+    for row in rows:
+        pic = str(get_field(row, "PIC"))
+        if pic not in seen:
+            seen.add(pic)
+            pic_options.append(pic)
+        if all(str(get_field(row, col)).strip() in values for col, values in filters) and \
+                (dates is None or get_field(row, "Tanggal") in dates):
+            matched.append(row)
+
+    offset = max(int(params.get("offset") or 0), 0)
+    limit = max(int(params.get("limit") or 0), 0) if "limit" in params else len(matched)
+    return {"total": len(matched), "offset": offset, "limit": limit,
+            "pic_options": pic_options, "rows": matched[offset:offset + limit]}
+
+
+# Format kolom seperti columnarTable di apps_script.txt
+def columnar_table(headers, rows, params):
+    columns = [[row[j] for row in rows] for j in range(len(headers))]
+    table = {"format": "columnar", "headers": headers, "count": len(rows)}
+    if params.get("compress") == "gzip":
+        table["encoding"] = "gzip+base64"
+        table["data"] = base64.b64encode(gzip.compress(json.dumps(columns).encode())).decode()
+    else:
+        table["columns"] = columns
+    return table
+
+
+# get_all_data: array objek (format lama), berhalaman, atau format kolom
+def all_data_response(rows, params):
+    if params.get("format") != "columnar":
+        return apply_query(rows, params, lambda r, c: r[c]) if is_query(params) else rows
+    arrays = [[r[h] for h in ALL_HEADERS] for r in rows]
+    if not is_query(params):
+        return columnar_table(ALL_HEADERS, arrays, params)
+    page = apply_query(arrays, params, lambda r, c: r[ALL_HEADERS.index(c)])
+    page.update(columnar_table(ALL_HEADERS, page.pop("rows"), params))
+    return page
+
+
+def is_query(params):
+    return any(key in params for key in ("pic", "date", "kondisi", "approve", "offset", "limit"))
+
+
+class Stats:
+    # Jumlah request dan byte per (deployment, action)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, endpoint, action, bytes_in, bytes_out):
+        with self.lock:
+            entry = self.counts.setdefault((endpoint, action), [0, 0, 0])
+            entry[0] += 1
+            entry[1] += bytes_in
+            entry[2] += bytes_out
+
+    def snapshot(self):
+        with self.lock:
+            return {key: list(value) for key, value in self.counts.items()}
+
+    # Selisih dua snapshot: (requests, bytes_in, bytes_out, {(endpoint, action): requests})
+    @staticmethod
+    def diff(before, after):
+        per_action = {}
+        total = [0, 0, 0]
+        for key, value in after.items():
+            old = before.get(key, [0, 0, 0])
+            delta = [value[i] - old[i] for i in range(3)]
+            if delta[0]:
+                per_action[key] = delta[0]
+            total = [total[i] + delta[i] for i in range(3)]
+        return total[0], total[1], total[2], per_action
+
+
+class MockAppsScript:
+    def __init__(self, rows=1000, latency=DEFAULT_LATENCY, row_cost=DEFAULT_ROW_COST, seed=1, legacy_ids=False):
+        self.book = Workbook(rows, seed)
+        self.latency = latency
+        self.row_cost = row_cost
+        # True: ID baru = ID terakhir di sheet + 1 tanpa lock (perilaku addData lama)
+        self.legacy_ids = legacy_ids
+        self.stats = Stats()
+        self._local = threading.local()
+        # idempotency_key -> hasil, seperti cache kiriman di apps_script.txt
+        self.processed = {}
+
+    # Jeda buatan: dasar per request + sebanding dengan jumlah baris sheet yang dibaca.
+    # Hanya dicatat di sini; tidurnya dilakukan handler setelah lock dilepas supaya
+    # request paralel tetap berjalan bersamaan seperti eksekusi Apps Script.
+    def delay(self, rows_read=0):
+        self._local.delay = self.latency + self.row_cost * rows_read / 1000
+
+    def _wait(self):
+        time.sleep(getattr(self._local, "delay", self.latency))
+        self._local.delay = self.latency
+
+    def do_get(self, endpoint, params):
+        book = self.book
+        action = params.get("action")
+        with book.lock:
+            if action == "get_options":
+                self.delay()
+                if "if_version" not in params:
+                    return book.options
+                version = book.options_version()
+                if params["if_version"] == version:
+                    return {"version": version, "not_modified": True}
+                return {"version": version, "options": book.options}
+
+            if action == "get_data":
+                self.delay(len(book.spk) + len(book.all))
+                rows = [r for r in book.spk if int(r[0]) not in book.all_index]
+                if is_query(params):
+                    return apply_query(rows, params, lambda r, c: r[SPK_HEADERS.index(c)])
+                return rows
+
+            if action == "get_all_data":
+                self.delay(len(book.all))
+                return all_data_response(book.all, params)
+
+            if action == "get_changes":
+                return self.get_changes(params)
+
+        self.delay()
+        return {"error": "Invalid action"}
+
+    def get_changes(self, params):
+        book = self.book
+        sheet = params.get("sheet")
+        if sheet == "SPK":
+            headers, rows = SPK_HEADERS, book.spk
+        elif sheet == "ALL":
+            headers, rows = ALL_HEADERS, [[r[h] for h in ALL_HEADERS] for r in book.all]
+        elif sheet == "PIC_ID":
+            headers, rows = ["ID", "PIC"], book.pic_id
+        else:
+            self.delay()
+            return {"error": f"Sheet {sheet} tidak ditemukan"}
+
+        since_id = int(params.get("since_id") or 0)
+        since_rev = int(params.get("since_rev") or 0)
+        changed = {int(i) for i in params.get("ids", "").split(",") if i.strip().isdigit()}
+        changed |= {i for s, i in book.changelog[since_rev:] if s == sheet}
+
+        selected = [r for r in rows if int(r[0]) > since_id or int(r[0]) in changed]
+        self.delay(len(rows) if selected else 0)
+        result = {
+            "sheet": sheet,
+            "rev": len(book.changelog),
+            "max_id": max([since_id] + [int(r[0]) for r in rows[-1:]]),
+            "changed_ids": sorted(changed),
+            "headers": headers,
+            "rows": selected,
+        }
+        if params.get("format") == "columnar":
+            result.update(columnar_table(headers, result.pop("rows"), params))
+        return result
+
+    def do_post(self, endpoint, payload):
+        book = self.book
+        action = payload.get("action")
+        if action in ("add_data", "add_data_batch"):
+            records = payload.get("records", []) if action == "add_data_batch" else [payload]
+            self.delay(len(records))
+            results = self.add_records(records)
+            return {"status": "success", "results": results} if action == "add_data_batch" else results[0]
+
+        with book.lock:
+            if action in ("update_data", "update_data_batch"):
+                records = payload.get("records", []) if action == "update_data_batch" else [payload]
+                self.delay(len(book.spk) + len(records))
+                results = [self.once(r, lambda r: self.update_record(endpoint, r)) for r in records]
+                return {"status": "success", "results": results} if action == "update_data_batch" else results[0]
+
+        self.delay()
+        return {"error": "Invalid action"}
+
+    # Kiriman ulang dengan idempotency_key yang sama mengembalikan hasil sebelumnya
+    def once(self, record, apply):
+        key = record.get("idempotency_key")
+        if key in self.processed:
+            return self.processed[key]
+        result = apply(record)
+        if key and result.get("status") == "success":
+            self.processed[key] = result
+        return result
+
+    # Seperti addRecords: ID dipesan dari counter dan baris ditulis dalam satu lock.
+    # Dengan legacy_ids, ID terakhir dibaca dulu lalu baris ditulis belakangan (bisa bentrok).
+    def add_records(self, records):
+        book = self.book
+        if self.legacy_ids:
+            with book.lock:
+                next_id = int(book.spk[-1][0]) + 1 if book.spk else 1
+            time.sleep(LEGACY_WRITE_GAP)
+
+        with book.lock:
+            if not self.legacy_ids:
+                next_id = book.next_id
+            results = []
+            for record in records:
+                result = self.once(record, lambda r: self.add_record(r, next_id))
+                if result.get("new_id") == next_id:
+                    next_id += 1
+                results.append(result)
+            book.next_id = max(book.next_id, next_id)
+        return results
+
+    def add_record(self, record, new_id):
+        book = self.book
+        try:
+            tanggal = datetime.strptime(record.get("Tanggal", ""), "%Y-%m-%d").strftime("%d-%b-%y")
+        except ValueError:
+            return {"status": "error", "error": "Format tanggal tidak valid"}
+        row = [str(new_id)] + [str(record.get(h, "")) for h in SPK_HEADERS[1:7]] + [tanggal, str(record.get("PIC", ""))]
+        book.spk.append(row)
+        book.spk_index[new_id] = row
+        for pic in filter(None, (p.strip() for p in row[8].split(","))):
+            book.pic_id.append([str(new_id), pic])
+        book.log_change("SPK", [new_id])
+        return {"status": "success", "new_id": new_id}
+
+    def update_record(self, endpoint, record):
+        book = self.book
+        try:
+            record_id = int(record.get("ID"))
+        except (TypeError, ValueError):
+            return {"status": "error", "error": "ID tidak valid"}
+
+        # deployment SPV/SM menulis kolom approval di sheet ALL
+        if endpoint in ("spv", "sm"):
+            row = book.all_index.get(record_id)
+            if row is None:
+                return {"status": "error", "ID": record_id, "error": "ID tidak ditemukan"}
+            now = datetime.now().strftime("%d-%b-%y %H:%M")
+            if endpoint == "spv":
+                row.update(Kondisi=record.get("Kondisi", ""), Alasan=record.get("Alasan", ""),
+                           SPV=record.get("SPV", ""), **{"Last Update SPV": now})
+                result = {"status": "success", "ID": record_id, "last_update_spv": now}
+            else:
+                row.update(Approve=record.get("Approve", ""), Reason=record.get("Reason", ""),
+                           SM=record.get("SM", ""), **{"Last Update SM": now})
+                result = {"status": "success", "ID": record_id, "last_update_sm": now}
+            book.log_change("ALL", [record_id])
+            return result
+
+        row = book.spk_index.get(record_id)
+        if row is None:
+            return {"status": "error", "ID": record_id, "error": "ID tidak ditemukan"}
+        tanggal = record.get("Tanggal", row[7])
+        try:
+            tanggal = datetime.strptime(tanggal, "%Y-%m-%d").strftime("%d-%b-%y")
+        except ValueError:
+            pass
+        row[1:9] = [str(record.get(h, row[i + 1])) for i, h in enumerate(SPK_HEADERS[1:7])] + [tanggal, str(record.get("PIC", row[8]))]
+        book.pic_id = [p for p in book.pic_id if p[0] != str(record_id)]
+        for pic in filter(None, (p.strip() for p in row[8].split(","))):
+            book.pic_id.append([str(record_id), pic])
+        book.log_change("SPK", [record_id])
+        return {"status": "success", "ID": record_id}
+
+    def handler(self):
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, endpoint, action, obj, bytes_in):
+                body = json.dumps(obj).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                app.stats.add(endpoint, action, bytes_in, len(body))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+                endpoint = url.path.strip("/")
+                result = app.do_get(endpoint, params)
+                app._wait()
+                self._send(endpoint, params.get("action"), result, len(self.path))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                endpoint = urlparse(self.path).path.strip("/")
+                try:
+                    payload = json.loads(raw)
+                except ValueError:
+                    payload = {}
+                result = app.do_post(endpoint, payload)
+                app._wait()
+                self._send(endpoint, payload.get("action"), result, length)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    # Jalankan server di thread background; mengembalikan objek server (server_port, shutdown())
+    def start(self, port=0):
+        server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main():
+    args = sys.argv[1:]
+    rows = int(args[args.index("--rows") + 1]) if "--rows" in args else 1000
+    latency = float(args[args.index("--latency") + 1]) if "--latency" in args else DEFAULT_LATENCY
+    row_cost = float(args[args.index("--row-cost") + 1]) if "--row-cost" in args else DEFAULT_ROW_COST
+    port = int(args[args.index("--port") + 1]) if "--port" in args else 8765
+
+    server = MockAppsScript(rows, latency, row_cost, legacy_ids="--legacy-ids" in args).start(port)
+    print(f"Mock Apps Script ({rows} baris) di http://127.0.0.1:{server.server_port}")
+    print(f"Jalankan aplikasi dengan SPK_API_BASE=http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+# Benchmark halaman Streamlit terhadap benchmarks/mock_server.py (tanpa Google Apps Script).
+# Setiap interaksi dijalankan lewat AppTest; yang dilaporkan: waktu rerun, jumlah request
+# dan byte yang dikirim/diterima server, supaya regresi performa terlihat sebelum deploy.
+#
+#   python benchmarks/pages.py [--rows 10000] [--latency 0.5] [--row-cost 0.01] [login try_SPV ...]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import DEFAULT_LATENCY, DEFAULT_ROW_COST, MockAppsScript, Stats  # noqa: E402
+
+
+def _by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"widget '{label}' tidak ditemukan")
+
+
+def _first_option(widget):
+    options = [o for o in widget.options if o]
+    return options[1] if len(options) > 1 else options[0]
+
+
+def _fill_spk_form(at):
+    _by_label(at.selectbox, "BU").set_value("BU1").run()
+    for label in ("Produk", "Mesin"):
+        widget = _by_label(at.selectbox, label)
+        widget.set_value(_first_option(widget)).run()
+    widget = _by_label(at.selectbox, "Masalah")
+    widget.set_value(_first_option(widget))
+    widget = _by_label(at.selectbox, "Line")
+    widget.set_value(_first_option(widget))
+    at.text_area[0].set_value("Ganti bearing")
+    _by_label(at.date_input, "Tanggal").set_value(date.today())
+    widget = _by_label(at.multiselect, "PIC")
+    widget.set_value([widget.options[0]])
+
+
+def _click(label):
+    def action(at):
+        _by_label(at.button, label).click()
+    return action
+
+
+def _select(label, value):
+    def action(at):
+        _by_label(at.selectbox, label).set_value(value)
+    return action
+
+
+def _select_index(label, index):
+    def action(at):
+        widget = _by_label(at.selectbox, label)
+        widget.set_value(widget.options[min(index, len(widget.options) - 1)])
+    return action
+
+
+def _radio(label, value):
+    def action(at):
+        _by_label(at.radio, label).set_value(value)
+    return action
+
+
+def _page(value):
+    def action(at):
+        _by_label(at.number_input, "Pilih Halaman").set_value(value)
+    return action
+
+
+def _pic(at):
+    widget = _by_label(at.multiselect, "Pilih PIC")
+    widget.set_value(widget.options[:1])
+
+
+# Skenario per halaman: daftar (nama interaksi, fungsi(at) yang mengubah widget).
+# Interaksi "buka" menjalankan script pertama kali; sisanya dijalankan dengan at.run().
+SCENARIOS = {
+    "login": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("lihat Data SPK", _select("📂 Pilih Data yang Ingin Dilihat:", "Data SPK")),
+    ],
+    "add_spk_spv": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("filter PIC", _pic),
+        ("halaman 2", _page(2)),
+        ("isi form", _fill_spk_form),
+        ("tambah data", _click("➕ Tambah Data")),
+        ("konfirmasi", _click("✅ Ya, Tambah Data")),
+    ],
+    "update_spk_spv": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("filter PIC", _pic),
+        ("pilih ID lain", _select_index("Pilih ID", 1)),
+        ("update data", _click("Update Data")),
+    ],
+    "try_SPV": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("halaman 2", _page(2)),
+        ("filter Close & Done", _select("Pilih Data yang Ingin Ditampilkan", "Close & Done")),
+        ("update data", _click("Update Data")),
+    ],
+    "try_SM": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("halaman 2", _page(2)),
+        ("filter Approved / Revise", _select("Pilih Data yang Ingin Ditampilkan", "Approved / Revise")),
+        ("update data", _click("Update Data")),
+    ],
+    "analytics": [
+        ("buka", None),
+        ("rerun", lambda at: None),
+        ("per Masalah", _select("Kelompokkan per", "Masalah")),
+        ("harian", _radio("Periode", "day")),
+    ],
+}
+
+
+def _app(page):
+    from streamlit.testing.v1 import AppTest
+    if page == "login":
+        return AppTest.from_file(os.path.join(ROOT, "login.py"), default_timeout=600)
+    script = f"import sys\nsys.path.insert(0, {ROOT!r})\nimport {page}\n{page}.run()\n"
+    return AppTest.from_string(script, default_timeout=600)
+
+
+def run_page(page, stats):
+    at = _app(page)
+    results = []
+    for name, action in SCENARIOS[page]:
+        try:
+            if action is not None:
+                action(at)
+        except LookupError as e:
+            results.append((name, None, 0, 0, 0, {}, str(e)))
+            continue
+
+        before = stats.snapshot()
+        t = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - t
+        requests, bytes_in, bytes_out, per_action = Stats.diff(before, stats.snapshot())
+        problems = [e.value for e in at.exception] + [e.value for e in at.error]
+        results.append((name, elapsed, requests, bytes_in, bytes_out, per_action, "; ".join(map(str, problems))))
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name, default, cast):
+        if name in args:
+            i = args.index(name)
+            value = cast(args[i + 1])
+            del args[i:i + 2]
+            return value
+        return default
+
+    rows = option("--rows", 5000, int)
+    latency = option("--latency", DEFAULT_LATENCY, float)
+    row_cost = option("--row-cost", DEFAULT_ROW_COST, float)
+    pages = args or list(SCENARIOS)
+
+    mock = MockAppsScript(rows, latency, row_cost)
+    server = mock.start()
+
+    # konfigurasi aplikasi harus di-set sebelum modul aplikasi diimport
+    tmp = tempfile.mkdtemp()
+    os.environ["SPK_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["SPK_MIRROR_PATH"] = os.path.join(tmp, "mirror.sqlite3")
+    os.environ["SPK_OPTIONS_PATH"] = os.path.join(tmp, "options_cache.json")
+    os.environ["SPK_OUTBOX_PATH"] = os.path.join(tmp, "outbox.sqlite3")
+
+    print(f"{rows} baris, latency {latency:.2f} s + {row_cost:.3f} s/1000 baris")
+    print(f"{'halaman':<16}{'interaksi':<26}{'waktu ms':>10}{'req':>6}{'KB kirim':>10}{'KB terima':>11}  action")
+    for page in pages:
+        for name, elapsed, requests, bytes_in, bytes_out, per_action, problem in run_page(page, mock.stats):
+            if elapsed is None:
+                print(f"{page:<16}{name:<26}{'dilewati':>10}  {problem}")
+                continue
+            actions = ", ".join(f"{ep}/{action}x{n}" for (ep, action), n in sorted(per_action.items(), key=str))
+            print(f"{page:<16}{name:<26}{elapsed * 1000:10.1f}{requests:6d}{bytes_in / 1024:10.1f}{bytes_out / 1024:11.1f}  {actions}")
+            if problem:
+                print(f"{'':<42}⚠️ {problem}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Benchmark waktu start aplikasi:
+#   1. cold import tiap modul (proses Python baru setiap kali)
+#   2. waktu sampai halaman login selesai dirender (first paint) saat Apps Script lambat
+# Jalankan dari root repo: python benchmarks/startup.py [--repeat N] [--delay DETIK]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul yang diukur waktu import-nya (login butuh streamlit + mirror; halaman lain dimuat setelah login)
+MODULES = [
+    "streamlit",
+    "pandas",
+    "mirror",
+    "add_spk_spv",
+    "update_spk_spv",
+    "bulk_spk_spv",
+    "try_SPV",
+    "try_SM",
+]
+
+
+def cold_import(module, repeat):
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+# Server tiruan Apps Script yang sengaja lambat menjawab get_changes
+def slow_server(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps({"rev": 0, "max_id": 0, "changed_ids": [], "headers": [], "rows": []}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def first_paint(delay):
+    os.environ["SPK_MIRROR_PATH"] = os.path.join(tempfile.mkdtemp(), "mirror.sqlite3")
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+    import api
+
+    server = slow_server(delay)
+    for name in api.ENDPOINTS:
+        api.ENDPOINTS[name] = f"http://127.0.0.1:{server.server_port}/{name}"
+
+    t = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, "login.py"), default_timeout=delay * 10 + 30).run()
+    elapsed = time.perf_counter() - t
+    server.shutdown()
+    return elapsed, [e.value for e in at.exception]
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = int(args[args.index("--repeat") + 1]) if "--repeat" in args else 5
+    delay = float(args[args.index("--delay") + 1]) if "--delay" in args else 3.0
+
+    print(f"Cold import (median {repeat}x)")
+    for module in MODULES:
+        print(f"  {module:<16} {cold_import(module, repeat) * 1000:8.1f} ms")
+
+    elapsed, exceptions = first_paint(delay)
+    print(f"\nFirst paint login.py (Apps Script lambat {delay:.1f} s): {elapsed * 1000:.1f} ms")
+    if exceptions:
+        print(f"  exception: {exceptions}")
+
+
+if __name__ == "__main__":
+    main()
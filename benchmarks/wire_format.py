@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import time
+
+# Bandingkan ukuran payload dan waktu decode get_all_data:
+# array objek per baris (format lama) vs format kolom vs format kolom + gzip.
+#   python benchmarks/wire_format.py [--rows 50000]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import columnar  # noqa: E402
+from mock_server import ALL_HEADERS, Workbook, all_data_response  # noqa: E402
+
+
+def measure(body, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        columnar.to_frame(json.loads(body), columns=ALL_HEADERS)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    args = sys.argv[1:]
+    rows = int(args[args.index("--rows") + 1]) if "--rows" in args else 50000
+    book = Workbook(rows)
+
+    print(f"get_all_data, {len(book.all)} baris sheet ALL")
+    print(f"{'format':<20}{'ukuran KB':>12}{'decode ms':>12}")
+    for name, params in [("objek per baris", {}), ("columnar", columnar.COLUMNAR), ("columnar + gzip", columnar.COLUMNAR_GZIP)]:
+        body = json.dumps(all_data_response(book.all, params))
+        print(f"{name:<20}{len(body) / 1024:12.1f}{measure(body) * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import streamlit as st
+import pandas as pd
+
+import api
+import mirror
+import options_index
+import options_store
+import outbox
+import schema
+
+# Kolom yang diisi untuk setiap record SPK
+INPUT_COLUMNS = ["BU", "Line", "Produk", "Mesin", "Masalah", "Tindakan", "Tanggal", "PIC"]
+
+# Format Tanggal yang diterima dari file unggahan, dicoba berurutan: format sheet, format tanggal
+# Excel (dibaca sebagai teks), lalu hari/bulan/tahun. Tanggal tidak pernah dibaca bulan-dulu.
+UPLOAD_DATE_FORMATS = schema.DATE_FORMATS["Tanggal"] + ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y"]
+
+# Jumlah baris SPK pending yang bisa diedit sekaligus
+MAX_EDIT_ROWS = 200
+
+
+# Baca file CSV/Excel yang diunggah (Excel butuh paket openpyxl)
+def read_upload(uploaded):
+    if uploaded.name.lower().endswith(".xlsx"):
+        df = pd.read_excel(uploaded, dtype=str)
+    else:
+        df = pd.read_csv(uploaded, dtype=str)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df.reindex(columns=INPUT_COLUMNS)
+
+
+# Cek isi tabel; mengembalikan DataFrame yang sudah bersih dan daftar pesan error per baris
+def validate(df, options):
+    df = df[INPUT_COLUMNS].dropna(how="all").copy()
+    for col in INPUT_COLUMNS:
+        if col != "Tanggal":
+            df[col] = df[col].fillna("").astype(str).str.strip()
+    df["Tanggal"] = pd.to_datetime(df["Tanggal"], errors="coerce")
+
+    errors = []
+    blank = df[[c for c in INPUT_COLUMNS if c != "Tanggal"]].eq("")
+    for idx in df.index[blank.any(axis=1)]:
+        errors.append(f"Baris {idx + 1}: kolom {', '.join(blank.columns[blank.loc[idx]])} kosong")
+    for idx in df.index[df["Tanggal"].isna()]:
+        errors.append(f"Baris {idx + 1}: Tanggal tidak valid")
+
+    # cek pasangan induk-anak terhadap master data (hanya jika opsi tersedia)
+    for key, parent in [("Produk", "BU"), ("Mesin", "BU"), ("Masalah", "Mesin")]:
+        if not options.raw.get(key):
+            continue
+        invalid = [options.position(key, v, p, default=None) is None for p, v in zip(df[parent], df[key])]
+        for idx in df.index[invalid]:
+            errors.append(f"Baris {idx + 1}: {key} '{df.at[idx, key]}' tidak terdaftar untuk {parent} '{df.at[idx, parent]}'")
+
+    return df, errors
+
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #85C1E9; padding: 15px; border-radius: 10px;'>
+            📋 Tambah / Update SPK Sekaligus
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # sinkronkan mirror lokal dan ambil opsi dari gspreadsheet secara paralel
+    sync = mirror.sync_async()
+    results, errors = api.get_many({
+        "options": lambda: options_store.get("spk"),
+    })
+    errors.update(sync.result())
+    for name, e in errors.items():
+        st.error(f"Terjadi kesalahan saat mengambil {name}: {e}")
+
+    options = options_index.get(results.get("options", {}))
+
+    column_config = {
+        "BU": st.column_config.SelectboxColumn("BU", options=options.values("BU")),
+        "Line": st.column_config.SelectboxColumn("Line", options=options.values("Line")),
+        "Tanggal": st.column_config.DateColumn("Tanggal", format="DD-MMM-YY"),
+        "PIC": st.column_config.TextColumn("PIC", help="Pisahkan beberapa PIC dengan koma"),
+    }
+
+    tab_add, tab_update = st.tabs(["➕ Tambah Banyak Data", "📝 Update Banyak Data"])
+
+    with tab_add:
+        st.caption(
+            f"Isi tabel langsung atau unggah file CSV/Excel dengan kolom: {', '.join(INPUT_COLUMNS)}. "
+            "Tanggal ditulis hari/bulan/tahun (03/04/2025 = 3 April 2025) atau seperti di sheet (03-Apr-25)."
+        )
+        uploaded = st.file_uploader("Unggah File", type=["csv", "xlsx"])
+
+        if uploaded is not None:
+            try:
+                df_input = read_upload(uploaded)
+            except ImportError:
+                st.error("❌ Membaca file Excel membutuhkan paket openpyxl. Gunakan CSV atau install openpyxl.")
+                df_input = pd.DataFrame(columns=INPUT_COLUMNS)
+            except (ValueError, UnicodeDecodeError) as e:
+                st.error(f"❌ File tidak dapat dibaca: {e}")
+                df_input = pd.DataFrame(columns=INPUT_COLUMNS)
+        else:
+            df_input = pd.DataFrame(columns=INPUT_COLUMNS)
+        # Tanggal yang tidak cocok dengan UPLOAD_DATE_FORMATS dikosongkan dan ditandai tidak valid
+        df_input["Tanggal"] = schema.parse_dates(df_input["Tanggal"], UPLOAD_DATE_FORMATS, strict=False).dt.date
+
+        edited = st.data_editor(
+            df_input, num_rows="dynamic", column_config=column_config,
+            use_container_width=True,
+            key=f"bulk_add_{uploaded.name if uploaded else ''}_{st.session_state.get('bulk_round', 0)}"
+        )
+
+        df_valid, problems = validate(edited, options)
+        for problem in problems:
+            st.warning(f"⚠️ {problem}")
+
+        records = df_valid.assign(Tanggal=df_valid["Tanggal"].dt.strftime("%Y-%m-%d")).to_dict("records")
+        st.button(
+            f"➕ Tambah {len(df_valid)} Data", disabled=df_valid.empty or bool(problems),
+            on_click=submit_bulk, args=("add_data", records)
+        )
+
+    with tab_update:
+        update_table(options, column_config)
+
+    # hasil per baris (menunggu / tersimpan / gagal)
+    outbox.status_panel(st.session_state.get("bulk_outbox_keys", []), title="📮 Status Kiriman Massal", limit=None)
+
+
+# Simpan kiriman massal ke outbox lokal; worker mengirimnya sebagai action batch di background.
+# Setiap baris punya idempotency key, jadi baris yang dikirim ulang setelah timeout tidak tertulis dua kali.
+# Dipanggil sebagai on_click; isi tabel editor dikosongkan supaya baris yang sama tidak terkirim lagi.
+def submit_bulk(action, records):
+    keys = outbox.submit_many("spk", action, records)
+    st.session_state.setdefault("bulk_outbox_keys", []).extend(keys)
+    st.session_state.bulk_round = st.session_state.get("bulk_round", 0) + 1
+    st.toast(f"📥 {len(records)} data disimpan, sedang dikirim ke Google Sheet...")
+
+
+def update_table(options, column_config):
+    rows, total = mirror.query_pending_spk(limit=MAX_EDIT_ROWS)
+    if not rows:
+        st.warning("Tidak ada data SPK yang bisa diperbarui.")
+        return
+    if total > MAX_EDIT_ROWS:
+        st.caption(f"Menampilkan {MAX_EDIT_ROWS} dari {total} data SPK pending.")
+
+    # kolom category dikembalikan ke teks agar bisa diisi nilai baru di editor
+    df_before = schema.load_spk(rows)
+    df_before = df_before.astype({col: object for col in schema.CATEGORY_COLUMNS if col in df_before})
+    # Tanggal yang tidak sesuai format sheet dikosongkan, sama seperti sebelumnya
+    df_before["Tanggal"] = pd.to_datetime(
+        df_before["Tanggal"], format=schema.DATE_FORMATS["Tanggal"][0], errors="coerce"
+    ).dt.date
+
+    edited = st.data_editor(
+        df_before, column_config={**column_config, "ID": st.column_config.NumberColumn("ID", disabled=True)},
+        use_container_width=True, hide_index=True, key=f"bulk_update_{st.session_state.get('bulk_round', 0)}"
+    )
+
+    # hanya baris yang berubah yang dikirim
+    changed = edited.astype(str).ne(df_before.astype(str)).any(axis=1)
+    df_changed, problems = validate(edited[changed], options)
+    df_changed.insert(0, "ID", edited.loc[df_changed.index, "ID"])
+    for problem in problems:
+        st.warning(f"⚠️ {problem}")
+
+    records = df_changed.assign(
+        ID=df_changed["ID"].astype(str),
+        Tanggal=df_changed["Tanggal"].dt.strftime("%d-%b-%y")
+    ).to_dict("records")
+    st.button(
+        f"📝 Update {len(df_changed)} Data", disabled=df_changed.empty or bool(problems),
+        on_click=submit_bulk, args=("update_data", records)
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+# TTL (detik) untuk tiap action Apps Script
+TTL_PER_ACTION = {
+    "get_data": 60,
+    "get_all_data": 60,
+    "get_options": 600,
+    # delta sinkronisasi mirror tidak pernah di-cache
+    "get_changes": 0,
+}
+DEFAULT_TTL = 30
+
+# Jumlah maksimal entri yang disimpan sebelum entri paling lama dibuang
+MAX_ENTRIES = 64
+
+
+class _Flight:
+    # Satu pengambilan yang sedang berjalan; pemanggil lain dengan key sama menunggu hasilnya
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    # Cache bersama untuk satu proses Streamlit (semua session memakai objek yang sama)
+    def __init__(self, ttl_per_action=None, default_ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES):
+        self.ttl_per_action = dict(ttl_per_action or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> _Flight untuk pengambilan yang sedang berjalan (single-flight)
+        self._inflight = {}
+        # naik setiap invalidate; hasil pengambilan yang dimulai sebelum invalidate tidak disimpan
+        self._generation = 0
+
+    @staticmethod
+    def make_key(url, action, params=None):
+        return (url, action, tuple(sorted((params or {}).items())))
+
+    def ttl_for(self, action):
+        return self.ttl_per_action.get(action, self.default_ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        action = key[1]
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl_for(action), value)
+            self._data.move_to_end(key)
+            # buang entri yang paling lama tidak dipakai jika melebihi batas
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, url=None, action=None):
+        # Hapus entri berdasarkan URL dan/atau action; tanpa argumen berarti hapus semua
+        with self._lock:
+            self._generation += 1
+            for store in (self._data, self._inflight):
+                for key in list(store):
+                    if url is not None and key[0] != url:
+                        continue
+                    if action is not None and key[1] != action:
+                        continue
+                    # pengambilan yang sedang berjalan dilepas, pemanggil berikutnya mengambil ulang
+                    del store[key]
+
+    # Ambil dari cache, atau jalankan fetch(). Pemanggil bersamaan dengan key yang sama
+    # (dari session mana pun) berbagi satu fetch; on_wait dipanggil jika ikut menunggu.
+    def get_or_fetch(self, url, action, fetch, params=None, on_wait=None):
+        key = self.make_key(url, action, params)
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+
+        if not leader:
+            if on_wait is not None:
+                on_wait()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = fetch()
+            flight.value = value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+        # respons error dari Apps Script (dan action dengan TTL 0) tidak disimpan
+        if self.ttl_for(action) > 0 and not (isinstance(value, dict) and "error" in value):
+            self.set(key, value, generation)
+        return value
+
+
+cache = TTLCache(TTL_PER_ACTION)
@@ -0,0 +1,49 @@
+import base64
+import gzip
+import json
+
+# Parameter untuk meminta format kolom dari get_all_data dan get_changes
+COLUMNAR = {"format": "columnar"}
+COLUMNAR_GZIP = {"format": "columnar", "compress": "gzip"}
+
+
+def is_columnar(payload):
+    return isinstance(payload, dict) and payload.get("format") == "columnar"
+
+
+# Isi kolom dari payload columnar (didekompresi jika encoding gzip+base64)
+def decode_columns(payload):
+    if payload.get("encoding") == "gzip+base64":
+        return json.loads(gzip.decompress(base64.b64decode(payload["data"])))
+    return payload.get("columns", [])
+
+
+# Baris (list per baris) dari payload columnar; payload lain dikembalikan apa adanya
+def to_rows(payload):
+    if is_columnar(payload):
+        return [list(row) for row in zip(*decode_columns(payload))]
+    return payload
+
+
+# Bangun DataFrame dari respons Apps Script dalam bentuk apa pun:
+# format kolom, array objek per baris (format lama), array baris, atau objek berhalaman {"rows": ...}.
+# columns menentukan urutan kolom hasil; kolom yang tidak dikirim server diisi string kosong.
+# Hanya bentuk data yang diseragamkan: respons format lama tidak punya "total" dan tidak difilter,
+# jadi halaman berfilter diambil lewat api.get_all_page yang memfilter dan memotongnya di klien.
+def to_frame(payload, columns=None):
+    # pandas baru diimport di sini supaya modul ini ringan untuk mirror/login
+    import pandas as pd
+
+    if is_columnar(payload):
+        # kolom diberi nama setelah DataFrame dibuat, supaya header kembar tidak saling menimpa
+        data = decode_columns(payload)
+        df = pd.DataFrame({i: column for i, column in enumerate(data)}, columns=range(len(payload["headers"])))
+        df.columns = payload["headers"]
+        if columns is not None:
+            df = df.reindex(columns=columns, fill_value="")
+        return df
+    if isinstance(payload, dict) and "rows" in payload:
+        payload = payload["rows"]
+    if columns is not None and payload and isinstance(payload[0], dict):
+        return pd.DataFrame(payload).reindex(columns=columns, fill_value="")
+    return pd.DataFrame(payload, columns=columns)
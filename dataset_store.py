@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+
+import mirror
+import schema
+
+# Dataset bertipe (DataFrame dari mirror lokal) yang dipegang sekali per proses dan dipakai bersama
+# oleh semua session. Setiap DataFrame terikat pada versi mirror.data_version() dan tidak pernah diubah
+# setelah dibuat, jadi session cukup menyimpan parameter filter lalu memakai view / index dari sini.
+# Total ukuran dibatasi SPK_DATASET_BUDGET_MB; versi yang paling lama tidak dipakai dibuang lebih dulu.
+BUDGET_BYTES = int(float(os.environ.get("SPK_DATASET_BUDGET_MB", "256")) * 1024 * 1024)
+
+# nama dataset -> (sheet mirror yang menentukan versinya, fungsi pembuat DataFrame)
+DATASETS = {
+    "ALL": (("ALL",), lambda: schema.load_all(mirror.read_all())),
+    "SPK": (("SPK", "ALL"), lambda: schema.load_spk(mirror.read_pending_spk())),
+}
+
+
+class DatasetStore:
+    def __init__(self, budget_bytes=BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        # (nama, versi) -> (DataFrame, ukuran byte), urut dari yang paling lama tidak dipakai
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # satu lock per dataset supaya versi yang sama hanya dibangun sekali walau diminta banyak session
+        self._build_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    # DataFrame versi terbaru; jangan diubah langsung (pakai .loc / filter yang menghasilkan objek baru)
+    def get(self, name):
+        sheets, build = DATASETS[name]
+        key = (name, mirror.data_version(*sheets))
+        df = self._cached(key)
+        if df is not None:
+            return df
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            # session lain mungkin sudah membangun versi ini selama menunggu lock
+            df = self._cached(key)
+            if df is not None:
+                return df
+            df = build()
+            size = int(df.memory_usage(deep=True).sum())
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (df, size)
+                self._evict(keep=key)
+        return df
+
+    # Buang entri paling lama tidak dipakai sampai total ukuran di bawah budget (entri baru tetap disimpan)
+    def _evict(self, keep):
+        total = sum(size for _, size in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key)[1]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "bytes": sum(size for _, size in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": [
+                    {"name": name, "version": list(version), "rows": len(df), "bytes": size}
+                    for (name, version), (df, size) in self._entries.items()
+                ],
+            }
+
+
+store = DatasetStore()
+
+
+def get(name):
+    return store.get(name)
+
+
+# True jika sheet sumber dataset sudah pernah tersinkron ke mirror (tanpa membangun DataFrame)
+def ready(name):
+    return any(mirror.data_version(*DATASETS[name][0]))
@@ -0,0 +1,116 @@
+import json
+
+import streamlit as st
+import pandas as pd
+
+import dataset_store
+import metrics
+
+
+# Tabel ringkasan per action/halaman dari hasil metrics.registry.export()
+def summary_table(stats):
+    rows = []
+    for name, stat in sorted(stats.items()):
+        latency = stat["latency"]
+        row = {
+            "Nama": name,
+            "Panggilan": stat["calls"],
+            "Rata-rata (ms)": latency["avg_ms"],
+            "p50 (ms)": latency["p50_ms"],
+            "p95 (ms)": latency["p95_ms"],
+            "Maks (ms)": latency["max_ms"],
+            "Error": stat["errors"],
+            "Error Rate": stat["error_rate"],
+            "KB": round(stat["bytes"] / 1024, 1),
+            "Baris": stat["rows"],
+            "Cache Hit": stat["cache_hit"],
+            "Cache Miss": stat["cache_miss"],
+            "Digabung": stat["coalesced"],
+            "Hit Rate": stat["cache_hit_rate"],
+        }
+        for stage, hist in stat["stages"].items():
+            row[f"{stage} (ms)"] = hist["avg_ms"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #5D6D7E; padding: 15px; border-radius: 10px;'>
+            📈 Diagnostik Performa
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    data = metrics.registry.export()
+    st.caption(f"Metrik dikumpulkan sejak {data['since']} (bersama untuk semua pengguna di server ini).")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        profiling = st.toggle("🔬 Profil cProfile per rerun", value=metrics.registry.profiling)
+        if profiling != metrics.registry.profiling:
+            metrics.registry.profiling = profiling
+            st.rerun()
+    with col2:
+        st.download_button(
+            "⬇️ Export JSON", json.dumps(data, indent=2),
+            file_name="metrics.json", mime="application/json", use_container_width=True
+        )
+    with col3:
+        if st.button("🗑️ Reset Metrik", use_container_width=True):
+            metrics.registry.reset()
+            st.rerun()
+
+    st.subheader("Pemanggilan Apps Script")
+    if data["api"]:
+        st.dataframe(summary_table(data["api"]), use_container_width=True, hide_index=True)
+    else:
+        st.info("Belum ada pemanggilan Apps Script yang tercatat.")
+
+    st.subheader("Rerun Halaman")
+    if data["pages"]:
+        st.dataframe(summary_table(data["pages"]), use_container_width=True, hide_index=True)
+    else:
+        st.info("Belum ada rerun halaman yang tercatat.")
+
+    # Histogram latency untuk satu action/halaman
+    names = [f"api: {n}" for n in sorted(data["api"])] + [f"halaman: {n}" for n in sorted(data["pages"])]
+    if names:
+        selected = st.selectbox("Histogram Latency", names)
+        kind, name = selected.split(": ", 1)
+        stat = data["api" if kind == "api" else "pages"][name]
+        buckets = stat["latency"]["buckets"]
+        # nomor urut di depan label supaya urutan bucket di grafik tidak berubah
+        labels = [f"{i + 1:02d}. {bucket} ms" for i, bucket in enumerate(buckets)]
+        st.bar_chart(pd.Series(list(buckets.values()), index=labels, name="Jumlah"))
+
+    # Dataset bersama (dataset_store): ukuran per versi terhadap budget memori
+    st.subheader("Dataset Bersama")
+    datasets = dataset_store.store.stats()
+    st.caption(
+        f"{datasets['bytes'] / 1024 / 1024:.1f} dari {datasets['budget_bytes'] / 1024 / 1024:.0f} MB, "
+        f"hit {datasets['hits']}, dibangun {datasets['misses']}, dibuang {datasets['evictions']}"
+    )
+    if datasets["entries"]:
+        st.dataframe(
+            pd.DataFrame([
+                {"Dataset": e["name"], "Versi": ".".join(map(str, e["version"])), "Baris": e["rows"],
+                 "MB": round(e["bytes"] / 1024 / 1024, 2)}
+                for e in datasets["entries"]
+            ]),
+            use_container_width=True, hide_index=True
+        )
+
+    st.subheader("Profil Rerun")
+    if not data["profiles"]:
+        st.info("Belum ada profil. Aktifkan profil cProfile lalu buka halaman yang ingin diperiksa.")
+    for page, profiles in data["profiles"].items():
+        for profile in reversed(profiles):
+            with st.expander(f"{page} — {profile['time']}"):
+                st.code(profile["profile"], language=None)
+
+
+if __name__ == "__main__":
+    run()
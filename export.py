@@ -0,0 +1,138 @@
+import csv
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+import streamlit as st
+
+import mirror
+
+# Ekspor data yang sedang ditampilkan ke CSV / Excel / Parquet. Baris dibaca dari mirror lokal per
+# potongan (mirror.CHUNK_ROWS) dan langsung ditulis ke file sementara di disk, jadi tidak pernah ada
+# DataFrame penuh maupun salinan hasil serialisasi di memori selama file dibuat.
+# Streamlit tetap memegang isi file untuk tombol unduh, karena itu file baru dibuat saat diminta.
+
+# Folder file ekspor sementara
+EXPORT_DIR = os.environ.get("SPK_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "spk_exports"))
+# File ekspor yang lebih lama dari ini (detik) dihapus saat ekspor berikutnya dibuat
+EXPORT_TTL = 60 * 60
+# Jumlah ekspor yang boleh dibuat bersamaan oleh semua session
+MAX_CONCURRENT = 2
+
+# nama format -> (ekstensi file, mimetype)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+
+# utf-8-sig supaya Excel membaca huruf non-ASCII dengan benar saat file CSV dibuka langsung
+def _write_csv(path, columns, chunks):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+# Excel butuh paket openpyxl; mode write_only menulis baris langsung tanpa menyimpan isi sheet
+def _write_xlsx(path, columns, chunks):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data")
+    ws.append(columns)
+    for rows in chunks:
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+# Parquet lewat pyarrow (terpasang bersama streamlit); satu row group per potongan.
+# ID disimpan sebagai angka, kolom lain sebagai teks seperti di sheet.
+def _write_parquet(path, columns, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c, pa.int64() if c == "ID" else pa.string()) for c in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            arrays = [pa.array(values, field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+WRITERS = {"CSV": _write_csv, "Excel": _write_xlsx, "Parquet": _write_parquet}
+
+
+def _cleanup():
+    now = time.time()
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > EXPORT_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Tulis potongan baris (iterable of list of list) ke file ekspor baru; mengembalikan path file
+def build(fmt, columns, chunks):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _cleanup()
+    fd, path = tempfile.mkstemp(suffix="." + FORMATS[fmt][0], dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        with _slots:
+            WRITERS[fmt](path, columns, chunks)
+    except BaseException:
+        _remove(path)
+        raise
+    return path
+
+
+# Panel ekspor untuk data yang sedang ditampilkan. source: fungsi tanpa argumen yang menghasilkan
+# potongan baris (misalnya lambda: mirror.iter_all(**filter)); query: nilai filter/pencarian yang
+# sedang aktif. File yang sudah disiapkan tidak dipakai lagi jika filter, format atau data berubah.
+@st.fragment
+def panel(key, name, columns, source, query=()):
+    with st.expander("⬇️ Ekspor Data"):
+        fmt = st.radio("Format", list(FORMATS), horizontal=True, key=f"{key}_export_format")
+        ident = (tuple(query), fmt, mirror.data_version(*mirror.SHEETS))
+
+        state_key = f"{key}_export"
+        current = st.session_state.get(state_key)
+        if current and current["ident"] != ident:
+            _remove(current["path"])
+            current = st.session_state[state_key] = None
+
+        if st.button("📦 Siapkan File", key=f"{key}_export_build"):
+            try:
+                with st.spinner("⏳ Menyiapkan file..."):
+                    path = build(fmt, columns, source())
+            except ImportError:
+                st.error("❌ Ekspor Excel membutuhkan paket openpyxl. Gunakan CSV/Parquet atau install openpyxl.")
+                return
+            current = st.session_state[state_key] = {"ident": ident, "path": path}
+
+        if current and os.path.exists(current["path"]):
+            ext, mime = FORMATS[fmt]
+            size = os.path.getsize(current["path"]) / 1024
+            size = f"{size:,.0f} KB" if size < 1024 else f"{size / 1024:,.1f} MB"
+            with open(current["path"], "rb") as f:
+                st.download_button(
+                    f"⬇️ Unduh {fmt} ({size})", f,
+                    file_name=f"{name}_{date.today():%Y%m%d}.{ext}", mime=mime, key=f"{key}_export_download"
+                )
+        st.caption("Data diambil dari salinan lokal hasil sinkronisasi terakhir dengan Google Sheet.")
@@ -1,6 +1,10 @@
 import streamlit as st
-import requests
-import pandas as pd
+
+import dataset_store
+import export
+import metrics
+import mirror
+import schema
 
 # Konfigurasi halaman utama
 st.set_page_config(page_title="Login", page_icon="🔐", layout="wide")
@@ -87,40 +91,64 @@ if not st.session_state.logged_in:
             unsafe_allow_html=True
         )
 
-# URL dari Apps Script Web App
-API_URL = "https://script.google.com/macros/s/AKfycbyLDNaiH2GdLTlX-eqlBFsemfMOn5ioJhYujFsHlzQqZBZlBpUs5T-Rmc6QJzjHXBPw/exec"
-
-# Pilihan sheet yang bisa ditampilkan
-option = st.selectbox("📂 Pilih Data yang Ingin Dilihat:", ["Data Preventive", "Data SPK"])
-
-# Ambil data sesuai pilihan
-if option == "Data Preventive":
-    response = requests.get(f"{API_URL}?action=get_all_data")
-    expected_columns = [
-        "ID", "BU", "Line", "Produk", "Mesin", "Tanggal",
-        "Mulai", "Selesai", "Masalah", "Tindakan", "Deskripsi",
-        "Quantity", "PIC", "Kondisi", "Alasan", "SPV", "Last Update SPV", 
-        "Approve", "Reason", "SM", "Last Update SM"
-    ]
-elif option == "Data SPK":
-    response = requests.get(f"{API_URL}?action=get_data")
-    expected_columns = [
-        "ID", "BU", "Line", "Produk", "Mesin", 
-        "Masalah", "Tindakan", "Tanggal", "PIC"
-    ]
-
-# Tampilkan data jika berhasil diambil
-if response.status_code == 200:
-    data = response.json()
-    
-    if "error" in data:
-        st.error(f"⚠️ Error: {data['error']}")
+# Sinkronisasi mirror berjalan di background supaya halaman tidak menunggu Apps Script
+sync = mirror.sync_async()
+
+
+# Preview data dari mirror lokal. Data hasil sinkronisasi terakhir langsung ditampilkan; sinkronisasi
+# yang sedang berjalan tidak ditunggu dan hasilnya tampil pada rerun berikutnya (tanpa rerun tambahan).
+# Hanya saat mirror belum pernah berisi data, bagian kecil wait_for_data dicek ulang tiap PREVIEW_POLL detik.
+PREVIEW_POLL = 1
+
+
+def preview_table(name, errors):
+    # DataFrame dipakai bersama semua session (satu salinan per versi data)
+    df = dataset_store.get(name)
+
+    # Tampilkan data jika berhasil diambil
+    if errors and df.empty:
+        st.error("⚠️ Gagal mengambil data. Periksa koneksi atau URL API.")
     else:
-        df = pd.DataFrame(data, columns=expected_columns)
-        st.dataframe(df, use_container_width=True)
-else:
-    st.error("⚠️ Gagal mengambil data. Periksa koneksi atau URL API.")
-    
+        if errors:
+            st.warning(f"⚠️ Sinkronisasi gagal ({', '.join(errors)}), menampilkan data lokal terakhir.")
+        st.dataframe(df, use_container_width=True, column_config=schema.column_config(df))
+
+        # ekspor dibaca langsung dari mirror per potongan, bukan dari DataFrame bersama di atas
+        if name == "ALL":
+            export.panel("preview", "data_preventive", schema.ALL_COLUMNS, mirror.iter_all, query=(name,))
+        else:
+            export.panel("preview", "data_spk", schema.SPK_COLUMNS, mirror.iter_pending_spk, query=(name,))
+
+
+# Menunggu sinkronisasi pertama; begitu data siap tabel digambar di sini, jadi halaman tidak perlu
+# dijalankan ulang. Polling berhenti pada rerun halaman berikutnya karena fragment ini tidak dipanggil lagi.
+@st.fragment(run_every=PREVIEW_POLL)
+def wait_for_data(sync, name):
+    if dataset_store.ready(name):
+        preview_table(name, sync.result() if sync.done() else {})
+    elif sync.done() and sync.result():
+        st.error("⚠️ Gagal mengambil data. Periksa koneksi atau URL API.")
+    else:
+        st.info("⏳ Data sedang dimuat...")
+
+
+@st.fragment
+def data_preview(sync):
+    # Pilihan sheet yang bisa ditampilkan
+    option = st.selectbox("📂 Pilih Data yang Ingin Dilihat:", ["Data Preventive", "Data SPK"])
+
+    name = "ALL" if option == "Data Preventive" else "SPK"
+
+    if not sync.done():
+        st.caption("🔄 Menyinkronkan data dengan Google Sheet...")
+    if not dataset_store.ready(name):
+        wait_for_data(sync, name)
+        return
+    preview_table(name, sync.result() if sync.done() else {})
+
+
+data_preview(sync)
+
 
 # Form login jika role sudah dipilih
 if st.session_state.role and not st.session_state.logged_in:
@@ -151,18 +179,37 @@ if st.session_state.role and not st.session_state.logged_in:
 if st.session_state.logged_in:
     
     if st.session_state.role == "SPV":
-        page = st.sidebar.selectbox("📌 Pilih Halaman:", ["Tambah SPK", "Update SPK", "Approval Preventive Form"], index=0)
-
-        if page == "Tambah SPK":
-            import add_spk_spv
-            add_spk_spv.run()
-        elif page == "Update SPK":
-            import update_spk_spv
-            update_spk_spv.run()
-        elif page == "Approval Preventive Form":
-            import try_SPV
-            try_SPV.run()
+        page = st.sidebar.selectbox("📌 Pilih Halaman:", ["Tambah SPK", "Update SPK", "Tambah/Update SPK (Bulk)", "Approval Preventive Form", "Analitik", "Diagnostik"], index=0)
+
+        # setiap rerun halaman diukur (lihat halaman Diagnostik)
+        with metrics.page(page):
+            if page == "Tambah SPK":
+                import add_spk_spv
+                add_spk_spv.run()
+            elif page == "Update SPK":
+                import update_spk_spv
+                update_spk_spv.run()
+            elif page == "Tambah/Update SPK (Bulk)":
+                import bulk_spk_spv
+                bulk_spk_spv.run()
+            elif page == "Approval Preventive Form":
+                import try_SPV
+                try_SPV.run()
+            elif page == "Analitik":
+                import analytics
+                analytics.run()
+            elif page == "Diagnostik":
+                import diagnostics
+                diagnostics.run()
 
     elif st.session_state.role == "SM":
-        import try_SM
-        try_SM.run()
+        page = st.sidebar.selectbox("📌 Pilih Halaman:", ["Approval Preventive Form", "Analitik"], index=0)
+
+        if page == "Approval Preventive Form":
+            with metrics.page("Approval Preventive Form (SM)"):
+                import try_SM
+                try_SM.run()
+        elif page == "Analitik":
+            with metrics.page("Analitik (SM)"):
+                import analytics
+                analytics.run()
\ No newline at end of file
@@ -0,0 +1,181 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Batas atas bucket histogram latency (ms); bucket terakhir menampung sisanya
+BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Jumlah hasil profil per halaman yang disimpan
+MAX_PROFILES = 10
+# Jumlah baris ringkasan pstats per profil
+PROFILE_LINES = 30
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, ms):
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    # Perkiraan persentil dari bucket (batas atas bucket tempat persentil jatuh)
+    def percentile(self, p):
+        if not self.count:
+            return None
+        target = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 1) if self.count else None,
+            "min_ms": round(self.min, 1) if self.min is not None else None,
+            "max_ms": round(self.max, 1) if self.max is not None else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": {f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}": n
+                        for i, (b, n) in enumerate(zip(BUCKETS_MS + [None], self.counts))},
+        }
+
+
+class Stat:
+    # Statistik satu action Apps Script atau satu halaman
+    def __init__(self):
+        self.latency = Histogram()
+        # tahap-tahap di dalam latency (misalnya network, decode) -> Histogram
+        self.stages = {}
+        # coalesced: pemanggilan yang menunggu request identik yang sedang berjalan
+        self.counters = {
+            "calls": 0, "errors": 0, "bytes": 0, "rows": 0, "cache_hit": 0, "cache_miss": 0, "coalesced": 0,
+        }
+
+    def to_dict(self):
+        calls = self.counters["calls"]
+        hits, misses = self.counters["cache_hit"], self.counters["cache_miss"]
+        return {
+            **self.counters,
+            "error_rate": round(self.counters["errors"] / calls, 3) if calls else None,
+            "cache_hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "latency": self.latency.to_dict(),
+            "stages": {name: h.to_dict() for name, h in self.stages.items()},
+        }
+
+
+class Registry:
+    # Metrik bersama untuk seluruh proses Streamlit (semua session)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        # profil cProfile per rerun halaman hanya diambil jika diaktifkan (mahal)
+        self.profiling = False
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._stats = {"api": {}, "page": {}}
+            self._profiles = {}
+
+    def _stat(self, kind, name):
+        return self._stats[kind].setdefault(name, Stat())
+
+    # Catat satu pemanggilan; stages: {nama tahap: detik}
+    def record(self, kind, name, seconds, error=False, size=0, rows=0, stages=None):
+        with self._lock:
+            stat = self._stat(kind, name)
+            stat.latency.add(seconds * 1000)
+            stat.counters["calls"] += 1
+            stat.counters["errors"] += int(bool(error))
+            stat.counters["bytes"] += size
+            stat.counters["rows"] += rows
+            for stage, stage_seconds in (stages or {}).items():
+                stat.stages.setdefault(stage, Histogram()).add(stage_seconds * 1000)
+
+    def cache_result(self, name, hit):
+        with self._lock:
+            self._stat("api", name).counters["cache_hit" if hit else "cache_miss"] += 1
+
+    def coalesced(self, name):
+        with self._lock:
+            self._stat("api", name).counters["coalesced"] += 1
+
+    def add_profile(self, page, text):
+        with self._lock:
+            self._profiles.setdefault(page, deque(maxlen=MAX_PROFILES)).append(
+                {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "profile": text}
+            )
+
+    def profiles(self, page=None):
+        with self._lock:
+            if page is not None:
+                return list(self._profiles.get(page, []))
+            return {name: list(items) for name, items in self._profiles.items()}
+
+    def export(self):
+        with self._lock:
+            return {
+                "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "api": {name: stat.to_dict() for name, stat in self._stats["api"].items()},
+                "pages": {name: stat.to_dict() for name, stat in self._stats["page"].items()},
+                "profiles": {name: list(items) for name, items in self._profiles.items()},
+            }
+
+
+registry = Registry()
+
+
+# Jumlah baris pada respons Apps Script (array, atau objek dengan "rows")
+def count_rows(data):
+    if isinstance(data, dict) and data.get("format") == "columnar":
+        return data.get("count", 0)
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and isinstance(data.get("rows"), list):
+        return len(data["rows"])
+    return 0
+
+
+# Ukur satu rerun halaman: with metrics.page("Tambah SPK"): add_spk_spv.run()
+@contextmanager
+def page(name):
+    profiler = cProfile.Profile() if registry.profiling else None
+    error = False
+    start = time.perf_counter()
+    if profiler:
+        try:
+            profiler.enable()
+        except ValueError:
+            # profiler lain sedang aktif (misalnya rerun session lain di Python 3.12+)
+            profiler = None
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        registry.record("page", name, time.perf_counter() - start, error=error)
+        if profiler:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            registry.add_profile(name, out.getvalue())
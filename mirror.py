@@ -0,0 +1,487 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import api
+import columnar
+import rollups
+from schema import SPK_COLUMNS, ALL_COLUMNS, PIC_ID_COLUMNS
+
+# Lokasi file SQLite untuk mirror sheet SPK, ALL dan PIC_ID
+MIRROR_PATH = os.environ.get("SPK_MIRROR_PATH", "mirror.sqlite3")
+
+# Deployment Apps Script yang punya action get_changes
+SYNC_ENDPOINT = "spk"
+
+# Jeda minimal antar sinkronisasi delta (detik)
+MIN_SYNC_INTERVAL = 15
+# Sinkronisasi penuh berkala untuk menangkap perubahan yang tidak tercatat di CHANGELOG
+# (misalnya edit manual langsung di spreadsheet)
+FULL_SYNC_INTERVAL = 6 * 60 * 60
+# Approval SPV/SM ditulis ke sheet ALL oleh deployment spv/sm yang tidak mencatat ke CHANGELOG, jadi
+# approval dari proses lain baru terlihat lewat sinkronisasi penuh; sheet ALL disinkronkan penuh lebih sering
+FULL_SYNC_INTERVALS = {"ALL": 5 * 60}
+
+# nama sheet -> (nama tabel, kolom)
+SHEETS = {
+    "SPK": ("spk", SPK_COLUMNS),
+    "ALL": ("all_data", ALL_COLUMNS),
+    "PIC_ID": ("pic_id", PIC_ID_COLUMNS),
+}
+
+# Kolom teks bebas yang diindeks full-text (FTS5) per tabel mirror
+SEARCH_COLUMNS = {
+    "spk": ["Masalah", "Tindakan"],
+    "all_data": ["Masalah", "Tindakan", "Deskripsi", "Alasan", "Reason"],
+}
+# Hasil pencarian diurutkan menurut relevansi (bm25) selama jumlahnya paling banyak RANK_MAX_MATCHES;
+# kata yang sangat umum (cocok dengan hampir semua baris) diurutkan dari ID terbaru supaya tetap cepat
+RANK_MAX_MATCHES = 10000
+# Filter kolom yang sama dengan parameter get_all_data (beberapa nilai dipisah "|")
+QUERY_FILTERS = api.QUERY_FILTERS
+# Jumlah baris per potongan saat membaca hasil besar untuk ekspor
+CHUNK_ROWS = 5000
+
+_lock = threading.Lock()
+# Thread khusus sinkronisasi; terpisah dari api.executor karena sync() sendiri memakai pool itu
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mirror")
+_last_sync = 0.0
+# Future sinkronisasi terakhir, dipakai bersama oleh semua session
+_future = None
+_future_lock = threading.Lock()
+# ID yang perlu diambil ulang pada sinkronisasi berikutnya, per sheet
+_dirty = {name: set() for name in SHEETS}
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _connect():
+    conn = sqlite3.connect(MIRROR_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _init(conn):
+    for table, columns in SHEETS.values():
+        cols = ", ".join(f"{_quote(c)} TEXT" for c in columns[1:])
+        key = "INTEGER PRIMARY KEY" if table != "pic_id" else "INTEGER"
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (ID {key}, {cols})")
+    conn.execute("CREATE INDEX IF NOT EXISTS pic_id_ID ON pic_id (ID)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sync_state ("
+        "sheet TEXT PRIMARY KEY, since_id INTEGER, since_rev INTEGER, full_sync_at REAL)"
+    )
+    # versi isi tiap sheet, naik setiap sinkronisasi yang mengubah baris (dipakai dataset_store)
+    conn.execute("CREATE TABLE IF NOT EXISTS data_version (sheet TEXT PRIMARY KEY, version INTEGER)")
+    # rekap analitik sheet ALL (lihat rollups.py)
+    rollups.init(conn, _all_rows)
+    for table in SEARCH_COLUMNS:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table}_fts",)).fetchone():
+            with conn:
+                _init_search(conn, table)
+
+
+# Indeks FTS5 (external content) atas kolom teks bebas. Trigger memperbarui indeks setiap kali
+# _apply menghapus/menulis baris, jadi sinkronisasi delta hanya mengindeks ulang baris yang berubah.
+# Isi tabel yang sudah ada diindeks sekali saat indeks dibuat.
+def _init_search(conn, table):
+    fts = f"{table}_fts"
+    columns = SEARCH_COLUMNS[table]
+    cols = ", ".join(_quote(c) for c in columns)
+    new = ", ".join(f"new.{_quote(c)}" for c in columns)
+    old = ", ".join(f"old.{_quote(c)}" for c in columns)
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', "
+        f"content_rowid='ID', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.ID, {new}); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.ID, {old}); END"
+    )
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+# Hapus indeks FTS5 beserta triggernya (sebelum sinkronisasi penuh menulis ulang seluruh tabel)
+def _drop_search(conn, table):
+    conn.execute(f"DROP TRIGGER IF EXISTS {table}_fts_insert")
+    conn.execute(f"DROP TRIGGER IF EXISTS {table}_fts_delete")
+    conn.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+def _all_rows(conn):
+    cols = ", ".join(_quote(c) for c in ALL_COLUMNS)
+    return [list(row) for row in conn.execute(f"SELECT {cols} FROM all_data")]
+
+
+def _state(conn, sheet):
+    row = conn.execute(
+        "SELECT since_id, since_rev, full_sync_at FROM sync_state WHERE sheet = ?", (sheet,)
+    ).fetchone()
+    return row or (0, 0, 0.0)
+
+
+# Isi tabel sama dengan baris dari sheet? Nilai dibandingkan sebagai teks seperti kolom TEXT di tabel;
+# beda penulisan angka (misalnya 1 dan "1.0") hanya membuat tabel ditulis ulang, tidak pernah terlewat.
+def _same_rows(conn, table, columns, rows):
+    cols = ", ".join(_quote(c) for c in columns)
+    current = conn.execute(f"SELECT {cols} FROM {table} ORDER BY ID, rowid").fetchall()
+    if len(current) != len(rows):
+        return False
+
+    def as_text(row):
+        return [row[0]] + [None if v is None else str(v) for v in row[1:]]
+
+    return all(as_text(a) == as_text(b) for a, b in zip(current, sorted(rows, key=lambda r: r[0])))
+
+
+# Tulis hasil get_changes ke tabel sheet; mengembalikan True jika ada baris yang berubah
+def _apply(conn, sheet, changes, full):
+    table, columns = SHEETS[sheet]
+    headers = changes.get("headers") or columns
+    # susun ulang kolom sesuai nama header dari sheet
+    positions = [headers.index(c) if c in headers else None for c in columns]
+    rows = []
+    for row in columnar.to_rows(changes) if columnar.is_columnar(changes) else changes.get("rows", []):
+        values = [row[i] if i is not None and i < len(row) else "" for i in positions]
+        try:
+            values[0] = int(values[0])
+        except (TypeError, ValueError):
+            continue
+        rows.append(values)
+    if table != "pic_id":
+        # ID dobel di sheet (misalnya dari alokasi ID lama) tidak boleh menggagalkan sinkronisasi:
+        # baris yang paling bawah di sheet yang dipakai
+        rows = list({r[0]: r for r in rows}.values())
+
+    if full and _same_rows(conn, table, columns, rows):
+        # isi sheet sama dengan mirror: tidak ada yang ditulis ulang (indeks full-text dan rekap tetap)
+        return False
+
+    if full:
+        # indeks full-text dibangun ulang sekali setelah semua baris ditulis (lebih cepat dari trigger per baris)
+        if table in SEARCH_COLUMNS:
+            # DDL ikut transaksi sinkronisasi supaya pembaca tidak pernah melihat indeks yang hilang
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            _drop_search(conn, table)
+        conn.execute(f"DELETE FROM {table}")
+        touched = True
+    else:
+        # ID yang berubah dihapus dulu, lalu ditulis ulang dari data terbaru
+        touched = {r[0] for r in rows} | set(changes.get("changed_ids", []))
+        conn.executemany(f"DELETE FROM {table} WHERE ID = ?", [(i,) for i in touched])
+
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+    if full and table in SEARCH_COLUMNS:
+        _init_search(conn, table)
+    if sheet == "ALL":
+        rollups.apply(conn, () if full else touched, rows, full)
+    return bool(touched)
+
+
+def mark_dirty(sheet, ids=()):
+    # Tandai ID yang baru ditulis supaya sinkronisasi berikutnya langsung berjalan
+    global _last_sync
+    _dirty[sheet].update(int(i) for i in ids)
+    _last_sync = 0.0
+
+
+# Sinkronkan mirror dengan Apps Script. Mengembalikan dict error per sheet (kosong jika sukses).
+def sync(force=False):
+    global _last_sync
+    if not force and time.monotonic() - _last_sync < MIN_SYNC_INTERVAL:
+        return {}
+
+    with _lock:
+        if not force and time.monotonic() - _last_sync < MIN_SYNC_INTERVAL:
+            return {}
+
+        conn = _connect()
+        try:
+            _init(conn)
+            calls, full = {}, {}
+            dirty = {}
+            for sheet in SHEETS:
+                since_id, since_rev, full_sync_at = _state(conn, sheet)
+                full[sheet] = time.time() - full_sync_at > FULL_SYNC_INTERVALS.get(sheet, FULL_SYNC_INTERVAL)
+                params = {"sheet": sheet, "since_id": 0, "since_rev": 0, **columnar.COLUMNAR_GZIP}
+                if not full[sheet]:
+                    params.update(since_id=since_id, since_rev=since_rev)
+                    dirty[sheet] = set(_dirty[sheet])
+                    if dirty[sheet]:
+                        params["ids"] = ",".join(str(i) for i in sorted(dirty[sheet]))
+                calls[sheet] = (SYNC_ENDPOINT, "get_changes", params)
+
+            results, errors = api.get_many(calls)
+            errors = {sheet: str(e) for sheet, e in errors.items()}
+
+            for sheet, changes in results.items():
+                if not isinstance(changes, dict) or "error" in changes:
+                    errors[sheet] = changes.get("error") if isinstance(changes, dict) else "format tidak dikenal"
+                    continue
+                try:
+                    with conn:
+                        if _apply(conn, sheet, changes, full[sheet]):
+                            conn.execute(
+                                "INSERT INTO data_version VALUES (?, 1) "
+                                "ON CONFLICT(sheet) DO UPDATE SET version = version + 1",
+                                (sheet,),
+                            )
+                        _, _, full_sync_at = _state(conn, sheet)
+                        conn.execute(
+                            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                            (sheet, changes.get("max_id", 0), changes.get("rev", 0),
+                             time.time() if full[sheet] else full_sync_at),
+                        )
+                except Exception as e:
+                    # transaksi sheet ini dibatalkan; sheet lain tetap tersinkron dan halaman tetap jalan
+                    errors[sheet] = str(e)
+                    continue
+                _dirty[sheet] -= dirty.get(sheet, _dirty[sheet])
+
+            # tetap dicatat walau gagal, supaya server yang bermasalah tidak dipanggil tiap rerun
+            _last_sync = time.monotonic()
+            return errors
+        finally:
+            conn.close()
+
+
+# Jalankan sync() di background; hasilnya Future berisi dict error per sheet.
+# Selama sinkronisasi masih berjalan atau baru saja selesai, Future yang sama dikembalikan
+# supaya rerun halaman tidak menumpuk antrean sinkronisasi.
+def sync_async(force=False):
+    global _future
+    with _future_lock:
+        if not force and _future is not None and (
+            not _future.done() or time.monotonic() - _last_sync < MIN_SYNC_INTERVAL
+        ):
+            return _future
+        _future = _executor.submit(sync, force)
+        return _future
+
+
+def _read(sql, params=()):
+    conn = _connect()
+    try:
+        _init(conn)
+        return [list(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+# Baris SPK yang ID-nya belum ada di sheet ALL (sama dengan action get_data)
+def read_pending_spk():
+    cols = ", ".join(_quote(c) for c in SPK_COLUMNS)
+    return _read(
+        f"SELECT {cols} FROM spk WHERE ID NOT IN (SELECT ID FROM all_data) ORDER BY ID"
+    )
+
+
+# Satu halaman SPK pending dengan filter PIC/tanggal (sama dengan parameter get_data).
+# text mencari di Masalah/Tindakan lewat indeks FTS5; hasilnya diurutkan menurut relevansi.
+# Mengembalikan (rows, total); limit=0 hanya menghitung total.
+def query_pending_spk(pic=None, date=None, offset=0, limit=None, text=None):
+    source, ranked = "spk", False
+    where, params = ["spk.ID NOT IN (SELECT ID FROM all_data)"], []
+    if text is not None and text.strip():
+        match = _match_query(text)
+        if not match:
+            return [], 0
+        source, ranked = "spk_fts JOIN spk ON spk.ID = spk_fts.rowid", True
+        where.append("spk_fts MATCH ?")
+        params.append(match)
+    if pic:
+        where.append(f"spk.PIC IN ({', '.join('?' for _ in pic)})")
+        params += list(pic)
+    if date:
+        where.append("spk.Tanggal = ?")
+        params.append(date.strftime("%d-%b-%y"))
+    cond = " AND ".join(where)
+
+    total = _read(f"SELECT COUNT(*) FROM {source} WHERE {cond}", params)[0][0]
+    if limit == 0:
+        return [], total
+
+    order = "spk.ID"
+    if ranked and total <= RANK_MAX_MATCHES:
+        order = "spk_fts.rank"
+    elif ranked:
+        # tanpa bm25: baris dibaca urut ID dari tabel, ID yang cocok dicek lewat subquery FTS
+        source, order = "spk", "spk.ID DESC"
+        cond = cond.replace("spk_fts MATCH ?", "spk.ID IN (SELECT rowid FROM spk_fts WHERE spk_fts MATCH ?)")
+    cols = ", ".join(f"spk.{_quote(c)}" for c in SPK_COLUMNS)
+    rows = _read(
+        f"SELECT {cols} FROM {source} WHERE {cond} ORDER BY {order} LIMIT ? OFFSET ?",
+        params + [-1 if limit is None else limit, offset],
+    )
+    return rows, total
+
+
+# Daftar PIC unik pada SPK pending (urut kemunculan) untuk pilihan filter
+def pending_pics():
+    rows = _read(
+        "SELECT PIC FROM spk WHERE ID NOT IN (SELECT ID FROM all_data) GROUP BY PIC ORDER BY MIN(ID)"
+    )
+    return [row[0] for row in rows]
+
+
+def pending_ids():
+    rows = _read("SELECT ID FROM spk WHERE ID NOT IN (SELECT ID FROM all_data) ORDER BY ID")
+    return [row[0] for row in rows]
+
+
+# Satu baris SPK berdasarkan ID, atau None jika tidak ada
+def read_spk(spk_id):
+    cols = ", ".join(_quote(c) for c in SPK_COLUMNS)
+    rows = _read(f"SELECT {cols} FROM spk WHERE ID = ?", (int(spk_id),))
+    return rows[0] if rows else None
+
+
+# Versi isi sheet-sheet mirror (tuple, urut sesuai argumen); berubah setiap kali isinya berubah
+def data_version(*sheets):
+    rows = dict(_read(
+        f"SELECT sheet, version FROM data_version WHERE sheet IN ({', '.join('?' for _ in sheets)})", sheets
+    ))
+    return tuple(rows.get(sheet, 0) for sheet in sheets)
+
+
+# Semua baris sheet ALL (sama dengan action get_all_data)
+def read_all():
+    cols = ", ".join(_quote(c) for c in ALL_COLUMNS)
+    return _read(f"SELECT {cols} FROM all_data ORDER BY ID")
+
+
+# Teks pencarian -> query FTS5: semua kata harus ada, kata 2 huruf ke atas dicari sebagai awalan
+# (memakai indeks prefix). Tanda baca dibuang supaya input tidak pernah jadi sintaks FTS5 yang tidak valid.
+def _match_query(text):
+    return " ".join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in re.findall(r"\w+", text or ""))
+
+
+# Kondisi WHERE untuk filter get_all_data (kondisi/approve/pic, nilai dipisah "|")
+def _filters(table, filters):
+    where, params = [], []
+    for key, value in filters.items():
+        if value is None or key not in QUERY_FILTERS:
+            continue
+        values = [v.strip() for v in str(value).split("|")]
+        where.append(f"TRIM({table}.{_quote(QUERY_FILTERS[key])}) IN ({', '.join('?' for _ in values)})")
+        params += values
+    return where, params
+
+
+# Cari di sheet ALL lewat indeks FTS5, urut relevansi; filters sama dengan get_all_data
+# (misalnya kondisi="Close|Done"). Mengembalikan (rows, total); limit=0 hanya menghitung total.
+def search_all(text, offset=0, limit=None, **filters):
+    match = _match_query(text)
+    if not match:
+        return [], 0
+    where, params = _filters("all_data", filters)
+    cond = " AND ".join(["all_data_fts MATCH ?"] + where)
+    source = "all_data_fts JOIN all_data ON all_data.ID = all_data_fts.rowid"
+
+    total = _read(f"SELECT COUNT(*) FROM {source} WHERE {cond}", [match] + params)[0][0]
+    if limit == 0:
+        return [], total
+
+    order = "all_data_fts.rank"
+    if total > RANK_MAX_MATCHES:
+        # tanpa bm25: baris dibaca urut ID dari tabel, ID yang cocok dicek lewat subquery FTS
+        source, order = "all_data", "all_data.ID DESC"
+        cond = cond.replace(
+            "all_data_fts MATCH ?", "all_data.ID IN (SELECT rowid FROM all_data_fts WHERE all_data_fts MATCH ?)"
+        )
+    cols = ", ".join(f"all_data.{_quote(c)}" for c in ALL_COLUMNS)
+    rows = _read(
+        f"SELECT {cols} FROM {source} WHERE {cond} ORDER BY {order} LIMIT ? OFFSET ?",
+        [match] + params + [-1 if limit is None else limit, offset],
+    )
+    return rows, total
+
+
+# Jalankan query dan hasilkan baris per potongan (list of list) tanpa memuat seluruh hasil ke memori.
+# Koneksi tetap terbuka (satu snapshot WAL) sampai generator habis atau ditutup.
+def _iter(sql, params=(), chunk_size=CHUNK_ROWS):
+    conn = _connect()
+    try:
+        _init(conn)
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [list(row) for row in rows]
+    finally:
+        conn.close()
+
+
+# Baris sheet ALL per potongan, urut ID, dengan filter get_all_data dan teks pencarian yang sama
+# seperti search_all (untuk ekspor data yang sedang ditampilkan)
+def iter_all(text=None, chunk_size=CHUNK_ROWS, **filters):
+    where, params = _filters("all_data", filters)
+    if text is not None and text.strip():
+        match = _match_query(text)
+        if not match:
+            return
+        where.insert(0, "all_data.ID IN (SELECT rowid FROM all_data_fts WHERE all_data_fts MATCH ?)")
+        params.insert(0, match)
+    cols = ", ".join(_quote(c) for c in ALL_COLUMNS)
+    cond = " AND ".join(where) or "1"
+    yield from _iter(f"SELECT {cols} FROM all_data WHERE {cond} ORDER BY ID", params, chunk_size)
+
+
+# Baris SPK pending per potongan, urut ID (sama dengan read_pending_spk)
+def iter_pending_spk(chunk_size=CHUNK_ROWS):
+    cols = ", ".join(_quote(c) for c in SPK_COLUMNS)
+    yield from _iter(
+        f"SELECT {cols} FROM spk WHERE ID NOT IN (SELECT ID FROM all_data) ORDER BY ID", (), chunk_size
+    )
+
+
+# Rekap analitik per nilai dimensi (BU/Line/Mesin/Masalah/PIC) untuk periode "day" atau "week"
+# dengan tanggal awal periode di antara start dan end (yyyy-mm-dd, boleh None).
+# Mengembalikan baris (nilai, jumlah kejadian, kejadian dengan durasi, downtime menit), urut downtime.
+def rollup(dimension, period, start=None, end=None):
+    where, params = _rollup_range(dimension, period, start, end)
+    return _read(
+        f"SELECT value, SUM(records), SUM(timed), SUM(downtime) FROM rollup WHERE {where} "
+        f"GROUP BY value HAVING SUM(records) > 0 ORDER BY SUM(downtime) DESC, SUM(records) DESC",
+        params,
+    )
+
+
+# Rekap per periode untuk beberapa nilai dimensi: baris (awal periode, nilai, jumlah kejadian, downtime menit)
+def rollup_series(dimension, period, values, start=None, end=None):
+    where, params = _rollup_range(dimension, period, start, end)
+    if not values:
+        return []
+    return _read(
+        f"SELECT start, value, records, downtime FROM rollup WHERE {where} "
+        f"AND value IN ({', '.join('?' for _ in values)}) AND records > 0 ORDER BY start",
+        params + list(values),
+    )
+
+
+# Rentang tanggal data di rekap (awal, akhir) atau (None, None) jika belum ada data
+def rollup_bounds():
+    return tuple(_read("SELECT MIN(start), MAX(start) FROM rollup WHERE period = 'day' AND records > 0")[0])
+
+
+def _rollup_range(dimension, period, start, end):
+    where, params = ["dimension = ?", "period = ?"], [dimension, period]
+    if start:
+        where.append("start >= ?")
+        params.append(str(start))
+    if end:
+        where.append("start <= ?")
+        params.append(str(end))
+    return " AND ".join(where), params
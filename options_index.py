@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+# Sheet opsi yang nilainya bergantung pada kolom pertama (induk):
+# Produk/Mesin/PIC per BU, Masalah per Mesin
+CHILD_LISTS = ["Produk", "Mesin", "PIC", "Masalah"]
+
+
+class OptionsIndex:
+    # Hasil get_options yang sudah disusun ulang menjadi lookup per induk,
+    # supaya setiap selectbox cukup O(1) tanpa menyaring ulang seluruh master data.
+    # List yang dikembalikan berupa tuple dan dipakai bersama, jadi tidak boleh diubah.
+    def __init__(self, raw):
+        self.raw = raw
+        self._lists = {}
+        self._positions = {}
+
+        for key, items in raw.items():
+            if not isinstance(items, list):
+                continue
+            if key in CHILD_LISTS:
+                grouped = {}
+                for item in items:
+                    if isinstance(item, list) and len(item) > 1:
+                        grouped.setdefault(item[0], []).append(item[1])
+                for parent, values in grouped.items():
+                    self._add(key, parent, values)
+            else:
+                values = [item[0] if isinstance(item, list) and item else item for item in items]
+                self._add(key, None, values)
+
+    def _add(self, key, parent, values):
+        values = tuple(values)
+        positions = {}
+        for i, value in enumerate(values):
+            positions.setdefault(value, i)
+        self._lists[(key, parent)] = values
+        self._positions[(key, parent)] = positions
+
+    # Nilai untuk sheet tanpa induk (BU, Line, SPV, SM)
+    def values(self, key):
+        return self._lists.get((key, None), ())
+
+    # Nilai anak untuk satu induk, misal children("Produk", "BU1")
+    def children(self, key, parent):
+        return self._lists.get((key, parent), ())
+
+    # Posisi value di daftar opsi (untuk parameter index selectbox), atau default jika tidak ada
+    def position(self, key, value, parent=None, default=0):
+        return self._positions.get((key, parent), {}).get(value, default)
+
+
+# Jumlah payload (per deployment) yang index-nya disimpan
+MAX_COMPILED = 8
+
+_lock = threading.Lock()
+_compiled = OrderedDict()
+_empty = OptionsIndex({})
+
+
+# Susun index sekali untuk setiap payload get_options. Payload dari options_store
+# adalah objek yang sama selama versinya tidak berubah, jadi index cukup dibangun
+# ulang saat master data di spreadsheet berubah.
+def get(raw):
+    if not isinstance(raw, dict) or "error" in raw:
+        return _empty
+    with _lock:
+        entry = _compiled.get(id(raw))
+        if entry is None or entry[0] is not raw:
+            entry = (raw, OptionsIndex(raw))
+            _compiled[id(raw)] = entry
+            while len(_compiled) > MAX_COMPILED:
+                _compiled.popitem(last=False)
+        _compiled.move_to_end(id(raw))
+        return entry[1]
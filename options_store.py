@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+import api
+
+# File JSON tempat opsi (master data) disimpan antar restart server
+OPTIONS_PATH = os.environ.get("SPK_OPTIONS_PATH", "options_cache.json")
+
+# Jeda minimal (detik) sebelum versi opsi dicek ulang ke Apps Script
+CHECK_INTERVAL = 60
+
+_lock = threading.Lock()
+# endpoint -> {"version": ..., "options": ...}; dimuat dari OPTIONS_PATH saat pertama dipakai
+_store = None
+# endpoint -> waktu (monotonic) pengecekan versi terakhir
+_checked = {}
+
+
+def _load():
+    global _store
+    if _store is None:
+        try:
+            with open(OPTIONS_PATH, encoding="utf-8") as f:
+                _store = json.load(f)
+        except (OSError, ValueError):
+            _store = {}
+    return _store
+
+
+def _save():
+    # tulis ke file sementara lalu ganti, supaya file tidak setengah jadi jika proses berhenti
+    tmp = OPTIONS_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_store, f)
+    os.replace(tmp, OPTIONS_PATH)
+
+
+# Opsi select box untuk satu deployment. Versi yang tersimpan dikirim sebagai if_version,
+# jadi master data hanya diunduh ulang jika isinya berubah di spreadsheet.
+# Objek yang dikembalikan sama selama versinya sama (index di options_index ikut dipakai ulang),
+# jadi jangan diubah langsung.
+def get(endpoint):
+    with _lock:
+        store = _load()
+        entry = store.get(endpoint)
+        if entry and time.monotonic() - _checked.get(endpoint, float("-inf")) < CHECK_INTERVAL:
+            return entry["options"]
+
+        try:
+            result = api.fetch(endpoint, "get_options", if_version=entry["version"] if entry else "")
+        except requests.exceptions.RequestException:
+            # server tidak bisa dihubungi: pakai salinan lokal jika ada
+            if entry:
+                return entry["options"]
+            raise
+
+        if not isinstance(result, dict) or "error" in result:
+            return entry["options"] if entry else result
+
+        _checked[endpoint] = time.monotonic()
+        if result.get("not_modified") and entry:
+            return entry["options"]
+
+        # deployment lama belum mendukung if_version dan mengembalikan opsi apa adanya
+        if "version" in result:
+            entry = {"version": result["version"], "options": result.get("options", {})}
+        else:
+            entry = {"version": "", "options": result}
+        store[endpoint] = entry
+        try:
+            _save()
+        except OSError:
+            pass
+        return entry["options"]
@@ -0,0 +1,344 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+import api
+import mirror
+
+# Antrean lokal untuk kiriman tambah/update ke Apps Script.
+# Kiriman disimpan dulu ke SQLite (langsung selesai bagi pengguna), lalu worker di background
+# mengirimnya dengan batch dan retry. Setiap kiriman punya idempotency_key supaya kiriman ulang
+# setelah timeout tidak membuat data dobel di sheet.
+OUTBOX_PATH = os.environ.get("SPK_OUTBOX_PATH", "outbox.sqlite3")
+
+PENDING = "pending"
+SENDING = "sending"
+COMMITTED = "committed"
+FAILED = "failed"
+
+# (endpoint, action) -> action batch di deployment yang sama
+BATCH_ACTIONS = {
+    ("spk", "add_data"): "add_data_batch",
+    ("spk", "update_data"): "update_data_batch",
+    ("spv", "update_data"): "update_data_batch",
+    ("sm", "update_data"): "update_data_batch",
+}
+# Deployment yang belum mengenal action batch membalas error ini; kiriman lalu dikirim satu per satu
+UNSUPPORTED_ERROR = "Invalid action"
+# sheet mirror yang berubah setelah kiriman dari endpoint ini tersimpan
+DIRTY_SHEETS = {"spk": "SPK", "spv": "ALL", "sm": "ALL"}
+
+# Nama kiriman untuk tabel status
+ACTION_LABELS = {
+    ("spk", "add_data"): "Tambah SPK",
+    ("spk", "update_data"): "Update SPK",
+    ("spv", "update_data"): "Approval SPV",
+    ("sm", "update_data"): "Approval SM",
+}
+
+# Retry: jeda RETRY_DELAY detik, dikali dua tiap percobaan, maksimal MAX_RETRY_DELAY
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 2
+MAX_RETRY_DELAY = 300
+# Kiriman berstatus "sending" lebih lama dari ini dianggap terputus (proses mati) dan diambil ulang
+STALE_AFTER = 300
+# Worker tetap memeriksa antrean tiap IDLE_WAIT detik walau tidak dibangunkan
+IDLE_WAIT = 5
+
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _connect():
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS outbox ("
+        "key TEXT PRIMARY KEY, endpoint TEXT, action TEXT, payload TEXT, status TEXT, "
+        "attempts INTEGER, error TEXT, result TEXT, created_at REAL, next_attempt_at REAL, claimed_at REAL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at)")
+    return conn
+
+
+# Simpan satu kiriman ke antrean; mengembalikan idempotency key-nya
+def submit(endpoint, action, record):
+    return submit_many(endpoint, action, [record])[0]
+
+
+# Simpan banyak kiriman sekaligus (satu transaksi); worker mengirimnya sebagai action batch.
+# Mengembalikan idempotency key per record, urut sesuai input.
+def submit_many(endpoint, action, records):
+    keys = [uuid.uuid4().hex for _ in records]
+    now = time.time()
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO outbox VALUES (?, ?, ?, ?, ?, 0, NULL, NULL, ?, ?, NULL)",
+                [(key, endpoint, action, json.dumps(record), PENDING, now, now) for key, record in zip(keys, records)],
+            )
+    finally:
+        conn.close()
+    start()
+    _wake.set()
+    return keys
+
+
+# Status kiriman: {key: {"status", "label", "record", "attempts", "error", "result", "created_at"}}
+def status(keys):
+    if not keys:
+        return {}
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT key, endpoint, action, payload, status, attempts, error, result, created_at "
+            f"FROM outbox WHERE key IN ({', '.join('?' for _ in keys)})",
+            list(keys),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        key: {
+            "status": state,
+            "label": ACTION_LABELS.get((endpoint, action), action),
+            "record": json.loads(payload),
+            "attempts": attempts,
+            "error": error,
+            "result": json.loads(result) if result else None,
+            "created_at": created_at,
+        }
+        for key, endpoint, action, payload, state, attempts, error, result, created_at in rows
+    }
+
+
+# Kirim ulang kiriman yang gagal
+def retry(keys):
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = 0, error = NULL, next_attempt_at = ? "
+                "WHERE key = ? AND status = ?",
+                [(PENDING, time.time(), key, FAILED) for key in keys],
+            )
+    finally:
+        conn.close()
+    start()
+    _wake.set()
+
+
+# Ambil kiriman yang sudah waktunya dikirim dan tandai "sending" dalam satu transaksi,
+# supaya dua proses Streamlit tidak mengirim kiriman yang sama
+def _claim(conn):
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT key, endpoint, action, payload, attempts FROM outbox "
+            "WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND claimed_at < ?) "
+            "ORDER BY created_at",
+            (PENDING, now, SENDING, now - STALE_AFTER),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE outbox SET status = ?, claimed_at = ? WHERE key = ?",
+            [(SENDING, now, row[0]) for row in rows],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def _done(conn, key, result):
+    conn.execute(
+        "UPDATE outbox SET status = ?, error = NULL, result = ? WHERE key = ?",
+        (COMMITTED, json.dumps(result), key),
+    )
+
+
+def _failed(conn, key, error):
+    conn.execute("UPDATE outbox SET status = ?, error = ? WHERE key = ?", (FAILED, error, key))
+
+
+# Gagal sementara (koneksi, timeout, kuota Apps Script): jadwalkan ulang dengan backoff
+def _reschedule(conn, key, attempts, error):
+    attempts += 1
+    if attempts >= MAX_ATTEMPTS:
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, error = ? WHERE key = ?",
+            (FAILED, attempts, error, key),
+        )
+        return
+    delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+    conn.execute(
+        "UPDATE outbox SET status = ?, attempts = ?, error = ?, next_attempt_at = ? WHERE key = ?",
+        (PENDING, attempts, error, time.time() + delay, key),
+    )
+
+
+# ID yang berubah di sheet karena kiriman ini (untuk mirror.mark_dirty)
+def _changed_id(record, result):
+    return result.get("new_id", record.get("ID"))
+
+
+# Kirim kiriman satu per satu dengan action tunggal (update_data / add_data)
+def _send_each(endpoint, action, rows):
+    sent = []
+    for key, record, attempts in rows:
+        try:
+            result = api.post(endpoint, {"action": action, **record, "idempotency_key": key})
+        except (requests.exceptions.RequestException, ValueError) as e:
+            result = {"error": str(e)}
+        if not isinstance(result, dict):
+            result = {"error": "Tidak diketahui"}
+        # error di level respons (kuota, lock, sheet sibuk) diperlakukan sebagai gagal sementara
+        sent.append((key, record, attempts, None if "error" in result else result, result.get("error")))
+    return sent
+
+
+# Kirim sekelompok kiriman dengan endpoint/action sama.
+# Mengembalikan daftar (key, record, attempts, hasil, error); hasil None berarti gagal sementara.
+def _send(endpoint, action, rows):
+    batch_action = BATCH_ACTIONS.get((endpoint, action))
+    if batch_action is None:
+        return _send_each(endpoint, action, rows)
+
+    sent = []
+
+    for offset in range(0, len(rows), api.BATCH_SIZE):
+        chunk = rows[offset:offset + api.BATCH_SIZE]
+        records = [{**record, "idempotency_key": key} for key, record, _ in chunk]
+        try:
+            response = api.post(endpoint, {"action": batch_action, "records": records})
+        except (requests.exceptions.RequestException, ValueError) as e:
+            response = {"error": str(e)}
+
+        if isinstance(response, dict) and isinstance(response.get("results"), list):
+            results = response["results"]
+            for i, (key, record, attempts) in enumerate(chunk):
+                result = results[i] if i < len(results) else None
+                if isinstance(result, dict):
+                    sent.append((key, record, attempts, result, None))
+                else:
+                    # hasil per record hilang atau tidak dikenali: dianggap gagal sementara dan dikirim ulang
+                    # (idempotency_key mencegah record yang sebenarnya sudah tersimpan tercatat dua kali)
+                    sent.append((key, record, attempts, None, "Hasil tidak lengkap dari Apps Script"))
+        elif isinstance(response, dict) and response.get("error") == UNSUPPORTED_ERROR:
+            sent.extend(_send_each(endpoint, action, chunk))
+        else:
+            error = response.get("error", "Tidak diketahui") if isinstance(response, dict) else "Tidak diketahui"
+            sent.extend((key, record, attempts, None, error) for key, record, attempts in chunk)
+    return sent
+
+
+# Kirim semua kiriman yang sudah waktunya; mengembalikan jumlah kiriman yang diproses
+def flush():
+    conn = _connect()
+    try:
+        rows = _claim(conn)
+        groups = {}
+        for key, endpoint, action, payload, attempts in rows:
+            groups.setdefault((endpoint, action), []).append((key, json.loads(payload), attempts))
+
+        for (endpoint, action), group in groups.items():
+            dirty = []
+            with conn:
+                for key, record, attempts, result, error in _send(endpoint, action, group):
+                    if result is None:
+                        _reschedule(conn, key, attempts, error)
+                    elif result.get("status") == "error" or "error" in result:
+                        # ditolak oleh Apps Script (data tidak valid, ID tidak ada): tidak diulang
+                        _failed(conn, key, result.get("error", "Tidak diketahui"))
+                    else:
+                        _done(conn, key, result)
+                        dirty.append(_changed_id(record, result))
+            mirror.mark_dirty(DIRTY_SHEETS.get(endpoint, "ALL"), [i for i in dirty if i not in (None, "")])
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def _run():
+    while True:
+        _wake.wait(IDLE_WAIT)
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            # database terkunci proses lain atau respons yang tidak terduga: worker tetap hidup dan
+            # mencoba lagi di putaran berikutnya (kiriman yang tertahan diklaim ulang setelah STALE_AFTER)
+            pass
+
+
+# Jalankan worker pengirim (sekali per proses)
+def start():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="outbox", daemon=True)
+            _worker.start()
+
+
+STATUS_LABELS = {
+    PENDING: "⏳ Menunggu dikirim",
+    SENDING: "📤 Sedang dikirim",
+    COMMITTED: "✅ Tersimpan",
+    FAILED: "❌ Gagal",
+}
+# Jumlah kiriman terakhir yang ditampilkan di tabel status
+MAX_SHOWN = 10
+# Selama masih ada kiriman yang menunggu, tabel status dicek ulang tiap STATUS_POLL detik
+STATUS_POLL = 1
+
+
+# Tabel status kiriman milik session ini (keys dari submit); limit=None menampilkan semua
+def status_panel(keys, title="📮 Status Kiriman", limit=MAX_SHOWN):
+    import streamlit as st
+
+    keys = list(keys)[-limit:] if limit else list(keys)
+    if not keys:
+        return
+    # kiriman yang tertinggal dari proses sebelumnya ikut terkirim begitu halaman dibuka
+    start()
+    waiting = any(s["status"] in (PENDING, SENDING) for s in status(keys).values())
+
+    @st.fragment(run_every=STATUS_POLL if waiting else None)
+    def panel():
+        current = status(keys)
+        rows = []
+        for key in reversed(keys):
+            item = current.get(key)
+            if item is None:
+                continue
+            result = item["result"] or {}
+            rows.append({
+                "Waktu": time.strftime("%H:%M:%S", time.localtime(item["created_at"])),
+                "Kiriman": item["label"],
+                # ID baru (tambah SPK) atau ID yang diperbarui
+                "ID": str(result.get("new_id", item["record"].get("ID", ""))),
+                "Status": STATUS_LABELS.get(item["status"], item["status"]),
+                "Keterangan": "" if item["status"] == COMMITTED else item["error"] or "",
+                "Percobaan": item["attempts"],
+            })
+
+        st.subheader(title)
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        failed = [key for key in keys if current.get(key, {}).get("status") == FAILED]
+        if failed and st.button(f"🔁 Kirim Ulang {len(failed)} Kiriman Gagal"):
+            retry(failed)
+            st.rerun()
+
+        if waiting and not any(current.get(key, {}).get("status") in (PENDING, SENDING) for key in keys):
+            # semua kiriman selesai: jalankan ulang halaman agar data terbaru tampil dan polling berhenti
+            st.rerun()
+
+    panel()
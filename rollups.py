@@ -0,0 +1,130 @@
+import schema
+
+# Rekap (rollup) analitik maintenance dari sheet ALL yang disimpan di mirror SQLite.
+# Setiap baris ALL diringkas sekali ke tabel all_metrics (tanggal, awal minggu, durasi perbaikan),
+# lalu trigger menambah/mengurangi angka di tabel rollup setiap kali baris masuk/keluar.
+# Halaman analitik cukup menjumlahkan beberapa baris rollup, tanpa membaca seluruh riwayat.
+
+# Kolom yang bisa dipakai untuk mengelompokkan rekap
+DIMENSIONS = ["BU", "Line", "Mesin", "Masalah", "PIC"]
+# Periode rekap -> kolom all_metrics berisi tanggal awal periode (yyyy-mm-dd)
+PERIODS = {"day": "day", "week": "week"}
+
+METRIC_COLUMNS = ["ID", "day", "week", "minutes"] + DIMENSIONS
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+# Ringkasan per baris ALL (list baris urut schema.ALL_COLUMNS) dengan operasi vektor pandas.
+# Durasi = Selesai - Mulai dalam menit (lewat tengah malam dihitung ke hari berikutnya);
+# kosong jika jam tidak valid. Baris dengan Tanggal tidak valid tidak ikut direkap.
+def compute(rows):
+    if not rows:
+        return []
+    # pandas baru diimport di sini supaya mirror tetap ringan untuk halaman login
+    import pandas as pd
+
+    df = pd.DataFrame(rows, columns=schema.ALL_COLUMNS)
+    tanggal = pd.to_datetime(df["Tanggal"].str.strip(), format=schema.DATE_FORMATS["Tanggal"][0], errors="coerce")
+    mulai = pd.to_datetime(df["Mulai"].str.strip(), format=schema.DATE_FORMATS["Mulai"][0], errors="coerce")
+    selesai = pd.to_datetime(df["Selesai"].str.strip(), format=schema.DATE_FORMATS["Selesai"][0], errors="coerce")
+    minutes = ((selesai - mulai).dt.total_seconds() / 60) % (24 * 60)
+
+    out = pd.DataFrame({
+        "ID": pd.to_numeric(df["ID"], errors="coerce"),
+        "day": tanggal.dt.strftime("%Y-%m-%d"),
+        # awal minggu (Senin)
+        "week": (tanggal - pd.to_timedelta(tanggal.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        "minutes": minutes,
+        **{dim: df[dim].fillna("").astype(str).str.strip() for dim in DIMENSIONS},
+    })
+    out = out[out["ID"].notna() & tanggal.notna()]
+    out["ID"] = out["ID"].astype("int64")
+    # NaN -> None supaya tersimpan sebagai NULL di SQLite
+    out["minutes"] = out["minutes"].astype(object).where(out["minutes"].notna(), None)
+    return list(out.itertuples(index=False, name=None))
+
+
+# Isi trigger: satu upsert / update rollup per kombinasi dimensi x periode
+def _trigger_body(sign):
+    statements = []
+    for dim in DIMENSIONS:
+        for period, column in PERIODS.items():
+            if sign > 0:
+                statements.append(
+                    f"INSERT INTO rollup VALUES ('{dim}', new.{_quote(dim)}, '{period}', new.{column}, 1, "
+                    f"new.minutes IS NOT NULL, COALESCE(new.minutes, 0)) "
+                    f"ON CONFLICT (dimension, value, period, start) DO UPDATE SET "
+                    f"records = records + 1, timed = timed + excluded.timed, downtime = downtime + excluded.downtime;"
+                )
+            else:
+                statements.append(
+                    f"UPDATE rollup SET records = records - 1, timed = timed - (old.minutes IS NOT NULL), "
+                    f"downtime = downtime - COALESCE(old.minutes, 0) "
+                    f"WHERE dimension = '{dim}' AND value = old.{_quote(dim)} AND period = '{period}' "
+                    f"AND start = old.{column};"
+                )
+    return " ".join(statements)
+
+
+def _create_triggers(conn):
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS all_metrics_insert AFTER INSERT ON all_metrics BEGIN {_trigger_body(1)} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS all_metrics_delete AFTER DELETE ON all_metrics BEGIN {_trigger_body(-1)} END")
+
+
+def _drop_triggers(conn):
+    conn.execute("DROP TRIGGER IF EXISTS all_metrics_insert")
+    conn.execute("DROP TRIGGER IF EXISTS all_metrics_delete")
+
+
+# Hitung ulang seluruh rollup dari all_metrics dengan GROUP BY (untuk sinkronisasi penuh)
+def _rebuild(conn):
+    conn.execute("DELETE FROM rollup")
+    for dim in DIMENSIONS:
+        for period, column in PERIODS.items():
+            conn.execute(
+                f"INSERT INTO rollup SELECT '{dim}', {_quote(dim)}, '{period}', {column}, COUNT(*), "
+                f"COUNT(minutes), COALESCE(SUM(minutes), 0) FROM all_metrics GROUP BY {_quote(dim)}, {column}"
+            )
+
+
+# Buat tabel rekap jika belum ada; mirror yang sudah berisi data direkap sekali dari tabel all_data
+def init(conn, read_all):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rollup'").fetchone():
+        return
+    cols = ", ".join(f"{_quote(dim)} TEXT" for dim in DIMENSIONS)
+    with conn:
+        # dicek ulang dalam transaksi tulis: proses/thread lain mungkin baru saja membuatnya
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rollup'").fetchone():
+            return
+        conn.execute(f"CREATE TABLE IF NOT EXISTS all_metrics (ID INTEGER PRIMARY KEY, day TEXT, week TEXT, minutes REAL, {cols})")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollup (dimension TEXT, value TEXT, period TEXT, start TEXT, "
+            "records INTEGER, timed INTEGER, downtime REAL, PRIMARY KEY (dimension, value, period, start))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rollup_period ON rollup (dimension, period, start)")
+        conn.executemany(f"INSERT INTO all_metrics VALUES ({', '.join('?' for _ in METRIC_COLUMNS)})",
+                         compute(read_all(conn)))
+        _rebuild(conn)
+        _create_triggers(conn)
+
+
+# Perbarui rekap setelah mirror menulis baris ALL (dipanggil di dalam transaksi sinkronisasi).
+# ids: ID yang dihapus/ditulis ulang; rows: baris baru; full: seluruh sheet ditulis ulang.
+def apply(conn, ids, rows, full):
+    placeholders = ", ".join("?" for _ in METRIC_COLUMNS)
+    if full:
+        # sinkronisasi penuh: rekap dihitung ulang sekali dengan GROUP BY, bukan trigger per baris
+        _drop_triggers(conn)
+        conn.execute("DELETE FROM all_metrics")
+        conn.executemany(f"INSERT INTO all_metrics VALUES ({placeholders})", compute(rows))
+        _rebuild(conn)
+        _create_triggers(conn)
+        return
+    conn.executemany("DELETE FROM all_metrics WHERE ID = ?", [(i,) for i in ids])
+    conn.executemany(f"INSERT INTO all_metrics VALUES ({placeholders})", compute(rows))
+    # kelompok yang sudah tidak punya baris dibuang supaya tabel rollup tidak terus membesar
+    conn.execute("DELETE FROM rollup WHERE records <= 0")
@@ -0,0 +1,104 @@
+# Kolom sheet SPK (hasil get_data) dan sheet ALL / Preventive (hasil get_all_data)
+SPK_COLUMNS = [
+    "ID", "BU", "Line", "Produk", "Mesin",
+    "Masalah", "Tindakan", "Tanggal", "PIC"
+]
+ALL_COLUMNS = [
+    "ID", "BU", "Line", "Produk", "Mesin", "Tanggal",
+    "Mulai", "Selesai", "Masalah", "Tindakan", "Deskripsi",
+    "Quantity", "PIC", "Kondisi", "Alasan", "SPV", "Last Update SPV",
+    "Approve", "Reason", "SM", "Last Update SM"
+]
+PIC_ID_COLUMNS = ["ID", "PIC"]
+
+# Kolom dengan sedikit nilai unik -> category (hemat memori, filter isin lebih cepat)
+CATEGORY_COLUMNS = ["BU", "Line", "Produk", "Mesin", "PIC", "Kondisi", "Approve"]
+# Kolom angka -> Int64 (boleh kosong)
+INT_COLUMNS = ["ID", "Quantity"]
+# Kolom tanggal/jam dengan format tampilan di sheet; format dicoba berurutan
+DATE_FORMATS = {
+    "Tanggal": ["%d-%b-%y"],
+    "Mulai": ["%H:%M"],
+    "Selesai": ["%H:%M"],
+    "Last Update SPV": ["%d-%b-%y %H:%M", "%d-%b-%y %H:%M:%S", "%d/%m/%Y %H:%M:%S"],
+    "Last Update SM": ["%d-%b-%y %H:%M", "%d-%b-%y %H:%M:%S", "%d/%m/%Y %H:%M:%S"],
+}
+
+
+# Parse satu kolom tanggal dengan format eksplisit (tanpa tebak format per elemen).
+# Mengembalikan None jika ada nilai yang tidak cocok dengan format mana pun; dengan strict=False
+# nilai itu menjadi NaT.
+def parse_dates(values, formats, strict=True):
+    import pandas as pd
+
+    values = values.astype("string").str.strip()
+    parsed = pd.to_datetime(values, format=formats[0], errors="coerce")
+    for fmt in formats[1:]:
+        missing = parsed.isna() & values.ne("")
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    if strict and (parsed.isna() & values.notna() & values.ne("")).any():
+        return None
+    return parsed
+
+
+def _to_int(values):
+    import pandas as pd
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    if (numbers.dropna() % 1 == 0).all():
+        return numbers.astype("Int64")
+    return numbers
+
+
+# Bangun DataFrame bertipe dari baris mentah (list of list) atau DataFrame berisi string.
+# Kolom tanggal yang formatnya tidak dikenali dibiarkan sebagai teks supaya isinya tidak hilang.
+def load(data, columns=None):
+    # pandas baru diimport di sini supaya mirror/login (yang memakai daftar kolom) tetap ringan
+    import pandas as pd
+
+    df = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=columns)
+    for col in df.columns:
+        if col in INT_COLUMNS:
+            df[col] = _to_int(df[col])
+        elif col in DATE_FORMATS:
+            parsed = parse_dates(df[col], DATE_FORMATS[col])
+            df[col] = parsed if parsed is not None else df[col].astype("category")
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def load_spk(rows):
+    return load(rows, SPK_COLUMNS)
+
+
+def load_all(data):
+    return load(data, ALL_COLUMNS)
+
+
+# Satu nilai Tanggal dari sheet (dd-MMM-yy) -> datetime.date, atau None jika kosong/tidak valid
+def parse_tanggal(value):
+    import pandas as pd
+
+    parsed = pd.to_datetime(value, format=DATE_FORMATS["Tanggal"][0], errors="coerce")
+    return None if pd.isna(parsed) else parsed.date()
+
+
+# column_config st.dataframe supaya kolom tanggal/jam tampil seperti di sheet
+def column_config(df):
+    import pandas as pd
+    import streamlit as st
+
+    config = {}
+    for col in df.columns:
+        if col not in DATE_FORMATS or not pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if col == "Tanggal":
+            config[col] = st.column_config.DateColumn(col, format="DD-MMM-YY")
+        elif col in ("Mulai", "Selesai"):
+            config[col] = st.column_config.TimeColumn(col, format="HH:mm")
+        else:
+            config[col] = st.column_config.DatetimeColumn(col, format="DD-MMM-YY HH:mm")
+    return config
@@ -1,124 +1,241 @@
 import streamlit as st
 import requests
-import json
-import pandas as pd  
 
-def run():
-    st.markdown(
-        """
-        <h1 style='text-align: center; color: white; background-color: #F8C471; padding: 15px; border-radius: 10px;'>
-            📝 Approval Preventive Form
-        </h1>
-        """,
-        unsafe_allow_html=True
+import api
+import columnar
+import export
+import mirror
+import options_store
+import outbox
+import schema
+
+# Pilihan filter -> parameter filter get_all_data
+FILTERS = {
+    "Data Keseluruhan": {},
+    "Close & Done": {"kondisi": "Close|Done"},
+    "Approved / Revise": {"approve": "Approved|Revise"},
+}
+
+# Mode approval massal: kandidat yang ditampilkan dan jumlah maksimalnya per tampilan
+BULK_FILTER = {"kondisi": "Close|Done", "approve": ""}
+BULK_LIMIT = 500
+
+# Halaman kembali ke 1 jika filter berubah
+def reset_page():
+    st.session_state.sm_page = 1
+
+# Ambil opsi SM dari sheet Google Spreadsheet
+def get_sm_list(options):
+    return options.get("SM", [])
+
+# Tabel data dengan filter dan pagination. Sebagai fragment, mengganti filter atau halaman hanya
+# menjalankan ulang bagian ini: satu halaman diambil lewat cache bersama, opsi tidak diambil ulang.
+# Nomor halaman ada di halaman (bukan sidebar) karena fragment tidak bisa menulis ke sidebar.
+@st.fragment
+def data_table(options):
+    # Selectbox untuk memilih filter data (halaman kembali ke 1 jika filter berubah)
+    filter_option = st.selectbox(
+        "Pilih Data yang Ingin Ditampilkan",
+        list(FILTERS),
+        on_change=reset_page
     )
-    # URL apps script
-    API_URL = "https://script.google.com/macros/s/AKfycbwdjUXFYoqeh5VkJ8ummSADWcXGhr_TgXFau_N-IJJlU5_m1Wi8Tbo0OB9HeiUsmsPeHQ/exec"
-
-    # Ambil semua data 
-    def get_all_data():
-        response = requests.get(f"{API_URL}?action=get_data")
-        if response.status_code == 200:
-            return response.json()
-        return []
-
-    # Ambil opsi SM dari sheet Google Spreadsheet
-    def get_sm_list():
-        response = requests.get(f"{API_URL}?action=get_options")
-        if response.status_code == 200:
-            options = response.json()
-            return options.get("SM", [])
-        return []
-
-    # Inisialisasi semua data
-    all_data = get_all_data()
+
+    # Pencarian teks bebas di mirror lokal (indeks full-text, hasil urut relevansi)
+    search = st.text_input(
+        "🔎 Cari Masalah / Tindakan / Deskripsi / Alasan",
+        key="sm_search",
+        on_change=reset_page
+    )
+
+    # Pagination (10 baris per halaman); filter dan slicing dikerjakan di server
+    items_per_page = 10
+    if "sm_page" not in st.session_state:
+        st.session_state.sm_page = 1
+    page_number = st.session_state.sm_page
+    offset = (page_number - 1) * items_per_page
+
+    if search.strip():
+        # filter yang sama dengan get_all_data dikerjakan di mirror bersama pencarian
+        rows, total = mirror.search_all(search, offset=offset, limit=items_per_page, **FILTERS[filter_option])
+        page = {"total": total, "rows": rows}
+    else:
+        # Ambil hanya halaman data yang dipilih dari sheet ALL
+        try:
+            page = api.get_all_page(offset=offset, limit=items_per_page, **FILTERS[filter_option])
+        except requests.exceptions.RequestException:
+            page = {}
 
     # Jika data berhasil diambil
-    if all_data:
+    if isinstance(page, dict) and "total" in page:
+        total_pages = max(1, -(-page["total"] // items_per_page))
+        if page_number > total_pages:
+            st.session_state.sm_page = total_pages
+            st.rerun()
+        st.number_input("Pilih Halaman", min_value=1, max_value=total_pages, step=1, key="sm_page")
+
         # Konversi ke DataFrame
-        df = pd.DataFrame(all_data, columns=[
-            "ID", "BU", "Line", "Produk", "Mesin", "Tanggal",
-            "Mulai", "Selesai", "Masalah", "Tindakan", "Deskripsi",
-            "Quantity", "PIC", "Kondisi", "Alasan", "SPV", "Last Update SPV", 
-            "Approve", "Reason", "SM", "Last Update SM"
-        ])
+        df = schema.load_all(columnar.to_frame(page, columns=schema.ALL_COLUMNS))
 
         # Pastikan kolom yang digunakan benar
         if "ID" in df.columns and "Approve" in df.columns:
-            # Selectbox untuk memilih filter data
-            filter_option = st.selectbox(
-                "Pilih Data yang Ingin Ditampilkan",
-                ["Data Keseluruhan", "Close & Done", "Approved / Revise"]
+            # **Tampilkan data setelah difilter**
+            st.subheader(f"Tabel Data - {filter_option} (Halaman {page_number} dari {total_pages})")
+            st.dataframe(df, column_config=schema.column_config(df))
+            st.caption(f"Menampilkan {len(df)} dari {page['total']} data.")
+
+            # semua baris hasil filter/pencarian (bukan hanya halaman ini) bisa diekspor
+            export.panel(
+                "sm", "approval_sm", schema.ALL_COLUMNS,
+                lambda: mirror.iter_all(search, **FILTERS[filter_option]), query=(filter_option, search)
             )
 
-            # **Filter dataframe berdasarkan pilihan**
-            if filter_option == "Close & Done":
-                df_filtered = df[df["Kondisi"].astype(str).isin(["Close", "Done"])]
-            elif filter_option == "Approved / Revise":
-                df_filtered = df[df["Approve"].astype(str).isin(["Approved", "Revise"])]
-            else:
-                df_filtered = df  # Tampilkan semua data jika pilih "Data Keseluruhan"
-
-            # **Tampilkan data setelah difilter**
-            st.subheader(f"Tabel Data - {filter_option}")
-            st.dataframe(df_filtered)
-
-            # **Ambil daftar ID berdasarkan hasil filter**
-            id_list = df_filtered["ID"].astype(str).tolist()
-
-            # **Pilihan ID dari selectbox (berdasarkan hasil filter)**
-            id_to_update = st.selectbox("Pilih ID untuk diupdate", id_list)
-
-            # **Jika ID dipilih, tampilkan data terkait**
-            if id_to_update:
-                record = df[df["ID"] == id_to_update]
-                st.write("### Data Saat Ini:")
-                st.dataframe(record)
-                
-                kondisi_status = record["Kondisi"].values[0]
-                
-                if kondisi_status in ["","On Progress"]:
-                    st.warning("🚫 Data ini belum dalam kondisi close/done oleh SPV!")
-                else:
-                    # Pilihan kondisi
-                    kondisi_options = ["Approved", "Revise"]
-                    kondisi = st.selectbox("Pilih Kondisi", kondisi_options)
-
-                    # Alasan hanya muncul jika kondisi "Revise"
-                    alasan = ""
-                    if kondisi == "Revise":
-                        alasan = st.text_area("Alasan")
-
-                    # Pilihan SM dari Google Sheet
-                    sm_list = get_sm_list()
-                    sm = st.selectbox("SM", sm_list)
-
-                    # **Tombol Update Data**
-                    if st.button("Update Data"):
-                        data = {
-                            "action": "update_data",
-                            "ID": id_to_update,
-                            "Approve": kondisi,
-                            "Reason": alasan,
-                            "SM": sm
-                        }
-
-                        response = requests.post(API_URL, data=json.dumps(data))
-
-                        if response.status_code == 200:
-                            result = response.json()
-                            last_update_sm = result.get("last_update_sm", "Tidak tersedia")
-                            
-                            st.success(f"✅ Data berhasil diperbarui!")
-                            st.session_state.form_add_reset = True
-                            st.rerun()
-                        else:
-                            st.error("❌ Gagal memperbarui data. Cek kembali input dan koneksi.")
+            record_picker(df, options)
         else:
             st.error("❌ Kolom 'ID' atau 'Kondisi' tidak ditemukan. Periksa struktur data yang diambil!")
 
     else:
         st.error("❌ Gagal mengambil data dari Google Sheet.")
+
+# Pilihan ID dari halaman yang sedang tampil; mengganti ID hanya menjalankan ulang fragment ini
+# beserta form di dalamnya, tabel tidak diambil ulang
+@st.fragment
+def record_picker(df, options):
+    # **Ambil daftar ID berdasarkan hasil filter**
+    id_list = df["ID"].astype(str).tolist()
+
+    # **Pilihan ID dari selectbox (berdasarkan hasil filter)**
+    id_to_update = st.selectbox("Pilih ID untuk diupdate", id_list)
+
+    # **Jika ID dipilih, tampilkan data terkait**
+    if id_to_update:
+        record = df[df["ID"].astype(str) == id_to_update]
+        st.write("### Data Saat Ini:")
+        st.dataframe(record)
+
+        kondisi_status = record["Kondisi"].values[0]
+
+        if kondisi_status in ["","On Progress"]:
+            st.warning("🚫 Data ini belum dalam kondisi close/done oleh SPV!")
+        else:
+            approval_form(id_to_update, get_sm_list(options))
+
+# Form approval SM; mengganti kondisi atau mengetik alasan hanya menjalankan ulang fragment ini
+@st.fragment
+def approval_form(id_to_update, sm_list):
+    # Pilihan kondisi
+    kondisi_options = ["Approved", "Revise"]
+    kondisi = st.selectbox("Pilih Kondisi", kondisi_options)
+
+    # Alasan hanya muncul jika kondisi "Revise"
+    alasan = ""
+    if kondisi == "Revise":
+        alasan = st.text_area("Alasan")
+
+    # Pilihan SM dari Google Sheet
+    sm = st.selectbox("SM", sm_list)
+
+    # **Tombol Update Data**
+    if st.button("Update Data"):
+        data = {
+            "ID": id_to_update,
+            "Approve": kondisi,
+            "Reason": alasan,
+            "SM": sm
+        }
+
+        # disimpan ke outbox lokal; pengiriman ke gsheets berjalan di background
+        key = outbox.submit("sm", "update_data", data)
+        st.session_state.setdefault("outbox_keys", []).append(key)
+        st.toast("📥 Update disimpan, sedang dikirim ke Google Sheet...")
+        st.session_state.form_add_reset = True
+        st.rerun()
+
+# Simpan approval massal ke outbox. Dipanggil sebagai on_click, jadi ID yang dikirim sudah
+# tersembunyi saat fragment digambar ulang (tanpa rerun tambahan atau mengambil ulang data).
+def submit_bulk(records):
+    keys = outbox.submit_many("sm", "update_data", records)
+    st.session_state.sm_bulk_sent.update(zip((record["ID"] for record in records), keys))
+    st.session_state.sm_bulk_all = False
+    st.toast(f"📥 {len(records)} approval disimpan, sedang dikirim ke Google Sheet...")
+
+# Mode approval massal: centang banyak ID lalu kirim sekaligus. Semua approval masuk outbox dalam
+# satu transaksi dan dikirim sebagai update_data_batch (hasil per ID tampil di tabel status).
+# ID yang masih dalam antrean atau sudah tersimpan disembunyikan dari tabel tanpa mengambil ulang data:
+# respons get_all_data bisa masih dari cache Apps Script, jadi ID yang sudah di-approve tetap disembunyikan
+# selama session ini supaya tidak di-approve dua kali. Hanya kiriman yang gagal yang tampil lagi.
+@st.fragment
+def bulk_approval(options):
+    # ID -> key outbox untuk approval massal session ini
+    sent = st.session_state.setdefault("sm_bulk_sent", {})
+    current = outbox.status(list(sent.values()))
+    hidden = {i for i, key in sent.items() if current.get(key, {}).get("status") != outbox.FAILED}
+
+    try:
+        page = api.get_all_page(offset=0, limit=BULK_LIMIT, **BULK_FILTER)
+    except requests.exceptions.RequestException:
+        page = {}
+
+    if not (isinstance(page, dict) and "total" in page):
+        st.error("❌ Gagal mengambil data dari Google Sheet.")
+        return
+
+    df = schema.load_all(columnar.to_frame(page, columns=schema.ALL_COLUMNS))
+    df = df[~df["ID"].astype(str).isin(hidden)]
+
+    st.subheader(f"Data Close & Done yang Belum Di-approve ({len(df)} data)")
+    if page["total"] > BULK_LIMIT:
+        st.caption(f"Menampilkan {BULK_LIMIT} data pertama dari {page['total']}; sisanya tampil setelah data ini diproses.")
+
+    # Kolom "Pilih" untuk mencentang ID; kolom lain tidak bisa diubah
+    select_all = st.checkbox("Pilih Semua", key="sm_bulk_all")
+    edited = st.data_editor(
+        df.assign(Pilih=select_all)[["Pilih"] + list(df.columns)],
+        use_container_width=True,
+        hide_index=True,
+        disabled=list(df.columns),
+        column_config={**schema.column_config(df), "Pilih": st.column_config.CheckboxColumn("Pilih")},
+    )
+    ids = edited.loc[edited["Pilih"], "ID"].astype(str).tolist()
+
+    # Satu keputusan untuk semua ID yang dicentang
+    kondisi = st.selectbox("Pilih Kondisi", ["Approved", "Revise"], key="sm_bulk_kondisi")
+    alasan = ""
+    if kondisi == "Revise":
+        alasan = st.text_area("Alasan", key="sm_bulk_alasan")
+    sm = st.selectbox("SM", get_sm_list(options), key="sm_bulk_sm")
+
+    records = [{"ID": i, "Approve": kondisi, "Reason": alasan, "SM": sm} for i in ids]
+    st.button(f"✅ Kirim {len(ids)} Approval", disabled=not ids, on_click=submit_bulk, args=(records,))
+
+    # hasil per ID (menunggu / tersimpan / gagal)
+    outbox.status_panel(list(sent.values()), title="📮 Status Approval Massal", limit=None)
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #F8C471; padding: 15px; border-radius: 10px;'>
+            📝 Approval Preventive Form
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # mirror lokal untuk pencarian disinkronkan di background (halaman tidak menunggu)
+    mirror.sync_async()
+
+    # Opsi diambil sekali per rerun halaman; tabel, pilihan ID dan form memakai ulang hasilnya
+    results, errors = api.get_many({
+        "options": lambda: options_store.get("sm"),
+    })
+
+    # Mode approval massal untuk memproses banyak ID sekaligus
+    if st.toggle("⚡ Mode Approval Massal", key="sm_bulk_mode"):
+        bulk_approval(results.get("options", {}))
+    else:
+        data_table(results.get("options", {}))
+
+    # status kiriman session ini (menunggu / tersimpan / gagal)
+    outbox.status_panel(st.session_state.get("outbox_keys", []))
         
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -1,124 +1,241 @@
 import streamlit as st
 import requests
-import json
-import pandas as pd  
 
-def run():
-    st.markdown(
-        """
-        <h1 style='text-align: center; color: white; background-color: #F8C471; padding: 15px; border-radius: 10px;'>
-            📝 Approval Preventive Form
-        </h1>
-        """,
-        unsafe_allow_html=True
+import api
+import columnar
+import export
+import mirror
+import options_store
+import outbox
+import schema
+
+# Pilihan filter -> parameter filter get_all_data
+FILTERS = {
+    "Data Keseluruhan": {},
+    "On Progress / Kosong": {"kondisi": "On Progress|"},
+    "Close & Done": {"kondisi": "Close|Done"},
+}
+
+# Mode approval massal: kandidat yang ditampilkan dan jumlah maksimalnya per tampilan
+BULK_FILTER = {"kondisi": "On Progress|"}
+BULK_LIMIT = 500
+
+# Halaman kembali ke 1 jika filter berubah
+def reset_page():
+    st.session_state.spv_page = 1
+
+# Ambil opsi SPV dari sheet Google Spreadsheet
+def get_spv_list(options):
+    return options.get("SPV", [])
+
+# Tabel data dengan filter dan pagination. Sebagai fragment, mengganti filter atau halaman hanya
+# menjalankan ulang bagian ini: satu halaman diambil lewat cache bersama, opsi tidak diambil ulang.
+# Nomor halaman ada di halaman (bukan sidebar) karena fragment tidak bisa menulis ke sidebar.
+@st.fragment
+def data_table(options):
+    # Selectbox untuk memilih filter data (halaman kembali ke 1 jika filter berubah)
+    filter_option = st.selectbox(
+        "Pilih Data yang Ingin Ditampilkan",
+        list(FILTERS),
+        on_change=reset_page
     )
-    # URL apps script
-    API_URL = "https://script.google.com/macros/s/AKfycbzr96YkQ_yT1Rld_I3Dw_q64FLKkawP9uTvennnlgJ0T8tYFuK6hiqgOBRj9y5XuZgI/exec"
-
-    # Ambil semua data 
-    def get_all_data():
-        response = requests.get(f"{API_URL}?action=get_data")
-        if response.status_code == 200:
-            return response.json()
-        return []
-
-    # Ambil opsi SPV dari sheet Google Spreadsheet
-    def get_spv_list():
-        response = requests.get(f"{API_URL}?action=get_options")
-        if response.status_code == 200:
-            options = response.json()
-            return options.get("SPV", [])
-        return []
-
-    # Inisialisasi semua data
-    all_data = get_all_data()
+
+    # Pencarian teks bebas di mirror lokal (indeks full-text, hasil urut relevansi)
+    search = st.text_input(
+        "🔎 Cari Masalah / Tindakan / Deskripsi / Alasan",
+        key="spv_search",
+        on_change=reset_page
+    )
+
+    # Pagination (10 baris per halaman); filter dan slicing dikerjakan di server
+    items_per_page = 10
+    if "spv_page" not in st.session_state:
+        st.session_state.spv_page = 1
+    page_number = st.session_state.spv_page
+    offset = (page_number - 1) * items_per_page
+
+    if search.strip():
+        # filter yang sama dengan get_all_data dikerjakan di mirror bersama pencarian
+        rows, total = mirror.search_all(search, offset=offset, limit=items_per_page, **FILTERS[filter_option])
+        page = {"total": total, "rows": rows}
+    else:
+        # Ambil hanya halaman data yang dipilih dari sheet ALL
+        try:
+            page = api.get_all_page(offset=offset, limit=items_per_page, **FILTERS[filter_option])
+        except requests.exceptions.RequestException:
+            page = {}
 
     # Jika data berhasil diambil
-    if all_data:
+    if isinstance(page, dict) and "total" in page:
+        total_pages = max(1, -(-page["total"] // items_per_page))
+        if page_number > total_pages:
+            st.session_state.spv_page = total_pages
+            st.rerun()
+        st.number_input("Pilih Halaman", min_value=1, max_value=total_pages, step=1, key="spv_page")
+
         # Konversi ke DataFrame
-        df = pd.DataFrame(all_data, columns=[
-            "ID", "BU", "Line", "Produk", "Mesin", "Tanggal",
-            "Mulai", "Selesai", "Masalah", "Tindakan", "Deskripsi",
-            "Quantity", "PIC", "Kondisi", "Alasan", "SPV", "Last Update SPV", 
-            "Approve", "Reason", "SM", "Last Update SM"
-        ])
+        df = schema.load_all(columnar.to_frame(page, columns=schema.ALL_COLUMNS))
 
         # Pastikan kolom yang digunakan benar
         if "ID" in df.columns and "Kondisi" in df.columns:
-            # Selectbox untuk memilih filter data
-            filter_option = st.selectbox(
-                "Pilih Data yang Ingin Ditampilkan",
-                ["Data Keseluruhan", "On Progress / Kosong", "Close & Done"]
+            # **Tampilkan data setelah difilter**
+            st.subheader(f"Tabel Data - {filter_option} (Halaman {page_number} dari {total_pages})")
+            st.dataframe(df, column_config=schema.column_config(df))
+            st.caption(f"Menampilkan {len(df)} dari {page['total']} data.")
+
+            # semua baris hasil filter/pencarian (bukan hanya halaman ini) bisa diekspor
+            export.panel(
+                "spv", "approval_spv", schema.ALL_COLUMNS,
+                lambda: mirror.iter_all(search, **FILTERS[filter_option]), query=(filter_option, search)
             )
 
-            # **Filter dataframe berdasarkan pilihan**
-            if filter_option == "On Progress / Kosong":
-                df_filtered = df[df["Kondisi"].astype(str).isin(["On Progress", ""])]
-            elif filter_option == "Close & Done":
-                df_filtered = df[df["Kondisi"].astype(str).isin(["Close", "Done"])]
-            else:
-                df_filtered = df  # Tampilkan semua data jika pilih "Data Keseluruhan"
-
-            # **Tampilkan data setelah difilter**
-            st.subheader(f"Tabel Data - {filter_option}")
-            st.dataframe(df_filtered)
-
-            # **Ambil daftar ID berdasarkan hasil filter**
-            id_list = df_filtered["ID"].astype(str).tolist()
-
-            # **Pilihan ID dari selectbox (berdasarkan hasil filter)**
-            id_to_update = st.selectbox("Pilih ID untuk diupdate", id_list)
-
-            # **Jika ID dipilih, tampilkan data terkait**
-            if id_to_update:
-                record = df[df["ID"] == id_to_update]
-                st.write("### Data Saat Ini:")
-                st.dataframe(record)
-                
-                approve_status = record["Approve"].values[0]
-                
-                if approve_status == "Approved":
-                    st.warning("🚫 Data ini sudah di-approve oleh SM!")
-                else:
-                    # Pilihan kondisi
-                    kondisi_options = ["On Progress", "Close", "Done"]
-                    kondisi = st.selectbox("Pilih Kondisi", kondisi_options)
-
-                    # Alasan hanya muncul jika kondisi "On Progress"
-                    alasan = ""
-                    if kondisi == "On Progress":
-                        alasan = st.text_area("Alasan")
-
-                    # Pilihan SPV dari Google Sheet
-                    spv_list = get_spv_list()
-                    spv = st.selectbox("SPV", spv_list)
-
-                    # **Tombol Update Data**
-                    if st.button("Update Data"):
-                        data = {
-                            "action": "update_data",
-                            "ID": id_to_update,
-                            "Kondisi": kondisi,
-                            "Alasan": alasan,
-                            "SPV": spv
-                        }
-
-                        response = requests.post(API_URL, data=json.dumps(data))
-
-                        if response.status_code == 200:
-                            result = response.json()
-                            last_update_spv = result.get("last_update_spv", "Tidak tersedia")
-                            
-                            st.success(f"✅ Data berhasil diperbarui!")
-                            st.session_state.form_add_reset = True
-                            st.rerun()
-                        else:
-                            st.error("❌ Gagal memperbarui data. Cek kembali input dan koneksi.")
+            record_picker(df, options)
         else:
             st.error("❌ Kolom 'ID' atau 'Kondisi' tidak ditemukan. Periksa struktur data yang diambil!")
 
     else:
         st.error("❌ Gagal mengambil data dari Google Sheet.")
 
+# Pilihan ID dari halaman yang sedang tampil; mengganti ID hanya menjalankan ulang fragment ini
+# beserta form di dalamnya, tabel tidak diambil ulang
+@st.fragment
+def record_picker(df, options):
+    # **Ambil daftar ID berdasarkan hasil filter**
+    id_list = df["ID"].astype(str).tolist()
+
+    # **Pilihan ID dari selectbox (berdasarkan hasil filter)**
+    id_to_update = st.selectbox("Pilih ID untuk diupdate", id_list)
+
+    # **Jika ID dipilih, tampilkan data terkait**
+    if id_to_update:
+        record = df[df["ID"].astype(str) == id_to_update]
+        st.write("### Data Saat Ini:")
+        st.dataframe(record)
+
+        approve_status = record["Approve"].values[0]
+
+        if approve_status == "Approved":
+            st.warning("🚫 Data ini sudah di-approve oleh SM!")
+        else:
+            approval_form(id_to_update, get_spv_list(options))
+
+# Form approval SPV; mengganti kondisi atau mengetik alasan hanya menjalankan ulang fragment ini
+@st.fragment
+def approval_form(id_to_update, spv_list):
+    # Pilihan kondisi
+    kondisi_options = ["On Progress", "Close", "Done"]
+    kondisi = st.selectbox("Pilih Kondisi", kondisi_options)
+
+    # Alasan hanya muncul jika kondisi "On Progress"
+    alasan = ""
+    if kondisi == "On Progress":
+        alasan = st.text_area("Alasan")
+
+    # Pilihan SPV dari Google Sheet
+    spv = st.selectbox("SPV", spv_list)
+
+    # **Tombol Update Data**
+    if st.button("Update Data"):
+        data = {
+            "ID": id_to_update,
+            "Kondisi": kondisi,
+            "Alasan": alasan,
+            "SPV": spv
+        }
+
+        # disimpan ke outbox lokal; pengiriman ke gsheets berjalan di background
+        key = outbox.submit("spv", "update_data", data)
+        st.session_state.setdefault("outbox_keys", []).append(key)
+        st.toast("📥 Update disimpan, sedang dikirim ke Google Sheet...")
+        st.session_state.form_add_reset = True
+        st.rerun()
+
+# Simpan approval massal ke outbox. Dipanggil sebagai on_click, jadi ID yang dikirim sudah
+# tersembunyi saat fragment digambar ulang (tanpa rerun tambahan atau mengambil ulang data).
+def submit_bulk(records):
+    keys = outbox.submit_many("spv", "update_data", records)
+    st.session_state.spv_bulk_sent.update(zip((record["ID"] for record in records), keys))
+    st.session_state.spv_bulk_all = False
+    st.toast(f"📥 {len(records)} approval disimpan, sedang dikirim ke Google Sheet...")
+
+# Mode approval massal: centang banyak ID lalu kirim sekaligus. Semua approval masuk outbox dalam
+# satu transaksi dan dikirim sebagai update_data_batch (hasil per ID tampil di tabel status).
+# ID yang masih dalam antrean atau sudah tersimpan disembunyikan dari tabel tanpa mengambil ulang data:
+# respons get_all_data bisa masih dari cache Apps Script, jadi ID yang sudah di-approve tetap disembunyikan
+# selama session ini supaya tidak di-approve dua kali. Hanya kiriman yang gagal yang tampil lagi.
+@st.fragment
+def bulk_approval(options):
+    # ID -> key outbox untuk approval massal session ini
+    sent = st.session_state.setdefault("spv_bulk_sent", {})
+    current = outbox.status(list(sent.values()))
+    hidden = {i for i, key in sent.items() if current.get(key, {}).get("status") != outbox.FAILED}
+
+    try:
+        page = api.get_all_page(offset=0, limit=BULK_LIMIT, **BULK_FILTER)
+    except requests.exceptions.RequestException:
+        page = {}
+
+    if not (isinstance(page, dict) and "total" in page):
+        st.error("❌ Gagal mengambil data dari Google Sheet.")
+        return
+
+    df = schema.load_all(columnar.to_frame(page, columns=schema.ALL_COLUMNS))
+    df = df[~df["ID"].astype(str).isin(hidden)]
+
+    st.subheader(f"Data On Progress / Kosong ({len(df)} data)")
+    if page["total"] > BULK_LIMIT:
+        st.caption(f"Menampilkan {BULK_LIMIT} data pertama dari {page['total']}; sisanya tampil setelah data ini diproses.")
+
+    # Kolom "Pilih" untuk mencentang ID; kolom lain tidak bisa diubah
+    select_all = st.checkbox("Pilih Semua", key="spv_bulk_all")
+    edited = st.data_editor(
+        df.assign(Pilih=select_all)[["Pilih"] + list(df.columns)],
+        use_container_width=True,
+        hide_index=True,
+        disabled=list(df.columns),
+        column_config={**schema.column_config(df), "Pilih": st.column_config.CheckboxColumn("Pilih")},
+    )
+    ids = edited.loc[edited["Pilih"], "ID"].astype(str).tolist()
+
+    # Satu keputusan untuk semua ID yang dicentang
+    kondisi = st.selectbox("Pilih Kondisi", ["On Progress", "Close", "Done"], key="spv_bulk_kondisi")
+    alasan = ""
+    if kondisi == "On Progress":
+        alasan = st.text_area("Alasan", key="spv_bulk_alasan")
+    spv = st.selectbox("SPV", get_spv_list(options), key="spv_bulk_spv")
+
+    records = [{"ID": i, "Kondisi": kondisi, "Alasan": alasan, "SPV": spv} for i in ids]
+    st.button(f"✅ Kirim {len(ids)} Approval", disabled=not ids, on_click=submit_bulk, args=(records,))
+
+    # hasil per ID (menunggu / tersimpan / gagal)
+    outbox.status_panel(list(sent.values()), title="📮 Status Approval Massal", limit=None)
+
+def run():
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: white; background-color: #F8C471; padding: 15px; border-radius: 10px;'>
+            📝 Approval Preventive Form
+        </h1>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # mirror lokal untuk pencarian disinkronkan di background (halaman tidak menunggu)
+    mirror.sync_async()
+
+    # Opsi diambil sekali per rerun halaman; tabel, pilihan ID dan form memakai ulang hasilnya
+    results, errors = api.get_many({
+        "options": lambda: options_store.get("spv"),
+    })
+
+    # Mode approval massal untuk memproses banyak ID sekaligus
+    if st.toggle("⚡ Mode Approval Massal", key="spv_bulk_mode"):
+        bulk_approval(results.get("options", {}))
+    else:
+        data_table(results.get("options", {}))
+
+    # status kiriman session ini (menunggu / tersimpan / gagal)
+    outbox.status_panel(st.session_state.get("outbox_keys", []))
+
 if __name__ == "__main__":
     run()
\ No newline at end of file
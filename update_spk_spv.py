@@ -1,7 +1,134 @@
 import streamlit as st
-import requests
 import pandas as pd
-from datetime import datetime
+
+import api
+import mirror
+import options_index
+import options_store
+import outbox
+import schema
+
+# Tabel SPK pending dengan filter dan pagination. Sebagai fragment, mengganti filter atau halaman
+# hanya menjalankan ulang bagian ini (baca mirror lokal), tanpa sinkronisasi, opsi, dan form.
+# Widget filter ada di halaman (bukan sidebar) karena fragment tidak bisa menulis ke sidebar.
+@st.fragment
+def data_table():
+    # Pencarian teks bebas (indeks full-text di mirror, hasil urut relevansi)
+    search = st.text_input("🔎 Cari Masalah / Tindakan", placeholder="contoh: ganti bearing")
+
+    # Filter data
+    with st.expander("🔍 Filter Data (Opsional)"):
+        col1, col2 = st.columns(2)
+
+        # Filter Tanggal
+        selected_date = col1.date_input("Pilih Tanggal", None)
+
+        # Filter PIC
+        pic_options = mirror.pending_pics()
+        selected_pic = col2.multiselect("Pilih PIC", pic_options)
+
+    # Pagination (10 baris per halaman); filter dan slicing dikerjakan di mirror
+    items_per_page = 10
+    _, total = mirror.query_pending_spk(selected_pic, selected_date, limit=0, text=search)
+    total_pages = max(1, -(-total // items_per_page))  # Pembulatan ke atas
+    page_number = st.number_input("Pilih Halaman", min_value=1, max_value=total_pages, value=1, step=1)
+
+    # Ambil hanya baris untuk halaman yang dipilih
+    rows, _ = mirror.query_pending_spk(
+        selected_pic, selected_date, offset=(page_number - 1) * items_per_page, limit=items_per_page, text=search
+    )
+    df_paginated = schema.load_spk(rows)
+
+    # Tampilkan tabel data
+    st.subheader(f"Data Keseluruhan (Halaman {page_number} dari {total_pages})")
+    st.dataframe(df_paginated, use_container_width=True, column_config=schema.column_config(df_paginated))
+
+
+# Pilihan ID yang akan diperbarui; mengganti ID hanya menjalankan ulang fragment ini
+# (satu baris dibaca dari mirror) beserta form di dalamnya, tidak dengan tabel
+@st.fragment
+def record_picker(editable_ids, options_payload):
+    st.subheader("Pilih Data untuk Diperbarui")
+    selected_id = st.selectbox("Pilih ID", editable_ids)
+    selected_data = pd.Series(mirror.read_spk(selected_id), index=schema.SPK_COLUMNS)
+    edit_form(selected_id, selected_data, options_payload)
+
+
+# Form update satu SPK; pilihan BU/Mesin yang saling bergantung hanya menjalankan ulang fragment ini
+@st.fragment
+def edit_form(selected_id, selected_data, options_payload):
+    options = options_index.get(options_payload)
+
+    st.subheader("Form Update Data")
+    # opsi dan posisi default diambil dari index (tanpa menyaring ulang master data)
+    bu = st.selectbox("BU", options.values("BU"), index=options.position("BU", selected_data["BU"]))
+
+    produk = st.selectbox("Produk", options.children("Produk", bu), index=options.position("Produk", selected_data["Produk"], bu))
+
+    mesin = st.selectbox("Mesin", options.children("Mesin", bu), index=options.position("Mesin", selected_data["Mesin"], bu))
+
+    masalah = st.selectbox("Masalah", options.children("Masalah", mesin), index=options.position("Masalah", selected_data["Masalah"], mesin))
+
+    line = st.selectbox("Line", options.values("Line"), index=options.position("Line", selected_data["Line"]))
+
+    tindakan = st.text_area("Tindakan Perbaikan", value=selected_data["Tindakan"])
+
+    # Tanggal kosong/tidak valid di sheet -> None; harus diisi sebelum update dikirim
+    tanggal = st.date_input("Tanggal", value=schema.parse_tanggal(selected_data["Tanggal"]))
+
+    pic_options = options.children("PIC", bu)
+    pic = st.multiselect("PIC", pic_options, default=[selected_data["PIC"]] if selected_data["PIC"] in pic_options else [])
+
+    if selected_id:
+        st.subheader("🔍 Perbandingan Data Sebelum & Sesudah")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("### 🟠 **Sebelum Update**")
+            st.dataframe(pd.DataFrame([selected_data]))
+
+        with col2:
+            st.markdown("### 🟢 **Setelah Update**")
+            updated_data = {
+                "ID": selected_id,
+                "BU": bu,
+                "Line": line,
+                "Produk": produk,
+                "Mesin": mesin,
+                "Masalah": masalah,
+                "Tindakan": tindakan,
+                "Tanggal": tanggal.strftime("%d-%b-%y") if tanggal else "",
+                "PIC": ", ".join(pic) if pic else ""
+            }
+            st.dataframe(pd.DataFrame([updated_data]))
+
+        st.markdown("---")  # Garis pemisah sebelum tombol update
+
+    # Tombol Update Data
+    if st.button("Update Data"):
+        if tanggal is None:
+            st.error("❌ Tanggal belum diisi. Pilih tanggal sebelum update data.")
+            return
+
+        update_data = {
+            "ID": selected_id,
+            "BU": bu,
+            "Line": line,
+            "Produk": produk,
+            "Mesin": mesin,
+            "Masalah": masalah,
+            "Tindakan": tindakan,
+            "Tanggal": tanggal.strftime("%d-%b-%y"),
+            "PIC": ", ".join(pic) if pic else ""
+        }
+
+        # disimpan ke outbox lokal; pengiriman ke gsheets berjalan di background
+        key = outbox.submit("spk", "update_data", update_data)
+        st.session_state.setdefault("outbox_keys", []).append(key)
+        st.toast("📥 Update disimpan, sedang dikirim ke Google Sheet...")
+        st.rerun()
+
 
 def run():
     st.markdown(
@@ -13,162 +140,26 @@ def run():
         unsafe_allow_html=True
     )
 
-    APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbyoDP56iTC_G6F08vWe7kJK2BpauDVZeea1aWwpqVKGe-C8o9K2D-Hx0seo1vMgcPE/exec"
-
-    def get_all_data():
-        try:
-            response = requests.get(APPS_SCRIPT_URL, params={"action": "get_data"}, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Terjadi kesalahan saat mengambil data: {e}")
-            return []
-
-    def get_options():
-        try:
-            response = requests.get(APPS_SCRIPT_URL, params={"action": "get_options"}, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Terjadi kesalahan saat mengambil opsi: {e}")
-            return {}
-
-    def get_all_ids():
-        try:
-            response = requests.get(APPS_SCRIPT_URL, params={"action": "get_all_ids"}, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Terjadi kesalahan saat mengambil ID: {e}")
-            return []
-
-    data = get_all_data()
-    options = get_options()
-    all_ids = get_all_ids()
-
-    if isinstance(data, list) and len(data) > 0:
-        df = pd.DataFrame(data, columns=["ID", "BU", "Line", "Produk", "Mesin", "Masalah", "Tindakan", "Tanggal", "PIC"])
-        df["Tanggal"] = pd.to_datetime(df["Tanggal"]).dt.date  
-
-        # Hapus data yang ID-nya ada di all_ids
-        editable_df = df[~df["ID"].astype(str).isin([str(i) for i in all_ids])]
-
-        # Sidebar untuk filter data
-        st.sidebar.header("🔍 Filter Data (Opsional)")
-
-        # Filter Tanggal
-        selected_date = st.sidebar.date_input("Pilih Tanggal", None)
-
-        # Filter PIC
-        pic_options = editable_df["PIC"].unique().tolist()
-        selected_pic = st.sidebar.multiselect("Pilih PIC", pic_options)
-
-        # Terapkan filter jika dipilih
-        df_filtered = editable_df.copy()
-        if selected_date:
-            df_filtered = df_filtered[df_filtered["Tanggal"] == selected_date]
-        if selected_pic:
-            df_filtered = df_filtered[df_filtered["PIC"].isin(selected_pic)]
-
-        # Pagination (10 baris per halaman)
-        items_per_page = 10
-        total_pages = max(1, -(-len(df_filtered) // items_per_page))  # Pembulatan ke atas
-        page_number = st.sidebar.number_input("Pilih Halaman", min_value=1, max_value=total_pages, value=1, step=1)
-
-        # Slice data untuk halaman yang dipilih
-        start_idx = (page_number - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        df_paginated = df_filtered.iloc[start_idx:end_idx]
-
-        # Tampilkan tabel data
-        st.subheader(f"Data Keseluruhan (Halaman {page_number} dari {total_pages})")
-        st.dataframe(df_paginated, use_container_width=True)
-
-        if not editable_df.empty:
-            st.subheader("Pilih Data untuk Diperbarui")
-            selected_id = st.selectbox("Pilih ID", editable_df["ID"].astype(str))
-            selected_data = editable_df[editable_df["ID"].astype(str) == selected_id].iloc[0]
-            
-            st.subheader("Form Update Data")
-            bu_options = [item[0] for item in options.get("BU", []) if isinstance(item, list)]
-            bu = st.selectbox("BU", bu_options, index=bu_options.index(selected_data["BU"]) if selected_data["BU"] in bu_options else 0)
-            
-            produk_options = [item[1] for item in options.get("Produk", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu]
-            produk = st.selectbox("Produk", produk_options, index=produk_options.index(selected_data["Produk"]) if selected_data["Produk"] in produk_options else 0)
-            
-            mesin_options = [item[1] for item in options.get("Mesin", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu]
-            mesin = st.selectbox("Mesin", mesin_options, index=mesin_options.index(selected_data["Mesin"]) if selected_data["Mesin"] in mesin_options else 0)
-            
-            masalah_options = [item[1] for item in options.get("Masalah", []) if isinstance(item, list) and len(item) > 1 and item[0] == mesin]
-            masalah = st.selectbox("Masalah", masalah_options, index=masalah_options.index(selected_data["Masalah"]) if selected_data["Masalah"] in masalah_options else 0)
-            
-            line_options = [item[0] for item in options.get("Line", []) if isinstance(item, list)]
-            line = st.selectbox("Line", line_options, index=line_options.index(selected_data["Line"]) if selected_data["Line"] in line_options else 0)
-            
-            tindakan = st.text_area("Tindakan Perbaikan", value=selected_data["Tindakan"])
-
-            tanggal = st.date_input("Tanggal", value=pd.to_datetime(selected_data["Tanggal"], format="%d-%b-%y").date())
-            
-            pic_options = [item[1] for item in options.get("PIC", []) if isinstance(item, list) and len(item) > 1 and item[0] == bu]
-            pic = st.multiselect("PIC", pic_options, default=[selected_data["PIC"]] if selected_data["PIC"] in pic_options else [])
-            
-            if selected_id:
-                st.subheader("🔍 Perbandingan Data Sebelum & Sesudah")
-
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.markdown("### 🟠 **Sebelum Update**")
-                    st.dataframe(pd.DataFrame([selected_data]))
-
-                with col2:
-                    st.markdown("### 🟢 **Setelah Update**")
-                    updated_data = {
-                        "ID": selected_id,
-                        "BU": bu,
-                        "Line": line,
-                        "Produk": produk,
-                        "Mesin": mesin,
-                        "Masalah": masalah,
-                        "Tindakan": tindakan,
-                        "Tanggal": tanggal.strftime("%d-%b-%y"),
-                        "PIC": ", ".join(pic) if pic else ""
-                    }
-                    st.dataframe(pd.DataFrame([updated_data]))
-
-                st.markdown("---")  # Garis pemisah sebelum tombol update
-
-            # Tombol Update Data
-            if st.button("Update Data"):
-                update_data = {
-                    "action": "update_data",
-                    "ID": selected_id,
-                    "BU": bu,
-                    "Line": line,
-                    "Produk": produk,
-                    "Mesin": mesin,
-                    "Masalah": masalah,
-                    "Tindakan": tindakan,
-                    "Tanggal": tanggal.strftime("%d-%b-%y"),
-                    "PIC": ", ".join(pic) if pic else ""
-                }
-
-                try:
-                    response = requests.post(APPS_SCRIPT_URL, json=update_data, timeout=10)
-                    response.raise_for_status()
-                    result = response.json()
-                    if result.get("status") == "success":
-                        st.success("✅ Data berhasil diperbarui!")
-                        st.rerun()
-                    else:
-                        st.error(f"❌ Gagal memperbarui data: {result.get('error', 'Tidak diketahui')}")
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Terjadi kesalahan saat mengirim data: {e}")
-
-        else:
-            st.warning("Tidak ada data yang bisa diperbarui karena ID sudah ada di sheet ALL.")
+    # sinkronisasi mirror dan opsi diambil paralel; waktu tunggu = request paling lambat
+    sync = mirror.sync_async()
+    results, errors = api.get_many({
+        "opsi": lambda: options_store.get("spk"),
+    })
+    errors.update(sync.result())
+    for name, e in errors.items():
+        st.error(f"Terjadi kesalahan saat mengambil {name}: {e}")
+
+    # hanya SPK yang ID-nya belum ada di sheet ALL yang bisa diperbarui (dihitung di mirror)
+    pending_ids = mirror.pending_ids()
+
+    if pending_ids:
+        data_table()
+        record_picker(pending_ids, results.get("opsi", {}))
     else:
         st.warning("Tidak ada data yang tersedia.")
 
+    # status kiriman session ini (menunggu / tersimpan / gagal)
+    outbox.status_panel(st.session_state.get("outbox_keys", []))
+
 if __name__ == "__main__":
     run()
\ No newline at end of file